@@ -1,11 +1,19 @@
 """Ticket management API endpoints."""
 
+import base64
 import logging
+import time
 from datetime import datetime
+from typing import Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, Query, Request
-from sqlalchemy.orm import Session
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response
+from sqlalchemy import select, tuple_, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import raiseload
 from sqlalchemy.sql import func
 
+from app.cache import cache_ticket, get_cached_ticket, invalidate_cached_ticket
 from app.database import get_db
 from models.ticket import Ticket, TicketStatus
 from models.enums import TicketCategory, UrgencyLevel, AIStatus
@@ -14,24 +22,48 @@ from models.schemas import (
     TicketUpdateRequest,
     TicketResponse,
     TicketListResponse,
-    PaginationMeta
+    PaginationMeta,
+    TicketStatsResponse,
+    TICKET_LIST_ADAPTER,
 )
 from tasks.triage import process_ticket_triage
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Per-process stats cache: absorbs dashboard/load-test polling storms
+STATS_CACHE_TTL_SECONDS = 1.0
+_stats_cache: Optional[Tuple[float, TicketStatsResponse]] = None
+
+# get_ticket caches only statuses the worker no longer changes
+CACHEABLE_STATUSES = frozenset({TicketStatus.COMPLETED, TicketStatus.FAILED})
 
 def get_limiter(request: Request):
     """Get shared limiter from app state."""
     return request.app.state.limiter
 
 
+def _encode_cursor(ticket: Ticket) -> str:
+    """Encode keyset position (created_at, id) of the last row as an opaque cursor."""
+    raw = f"{ticket.created_at.isoformat()}|{ticket.id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def _decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    """Decode cursor back into (created_at, id); raises 400 on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor.encode()).decode()
+        created_at, ticket_id = raw.rsplit("|", 1)
+        return datetime.fromisoformat(created_at), int(ticket_id)
+    except (ValueError, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
 @router.post("", status_code=201, response_model=TicketResponse)
-def create_ticket(
+async def create_ticket(
     ticket_create: TicketCreateRequest,
-    request: Request,  # Required for slowapi (param name must be 'request' by default)
-    db: Session = Depends(get_db)
+    request: Request,  # noqa: ARG001 - required by slowapi (param name must be 'request')
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Create a new support ticket.
@@ -48,41 +80,43 @@ def create_ticket(
     - Update category, sentiment, urgency, draft_response
     - Set status to completed or failed
     """
-    # Reference request to satisfy linter (ARG001) - used by slowapi decorator
-    _ = request.app.state.limiter
-    
     try:
         # Create ticket
         ticket = Ticket(customer_complaint=ticket_create.customer_complaint)
         db.add(ticket)
-        db.commit()
-        db.refresh(ticket)
+        # INSERT ... RETURNING already populates id/created_at/updated_at
+        # (eager server defaults), so no follow-up refresh SELECT is needed
+        await db.commit()
         
         logger.info(f"✅ Ticket {ticket.id} created (status=pending)")
         
         # Enqueue background task (returns immediately)
-        process_ticket_triage(ticket.id)
+        # Calling a Huey task only pushes a message to the queue; run the blocking
+        # Redis LPUSH off the event loop so other requests keep being served
+        await run_in_threadpool(process_ticket_triage, ticket.id)
         logger.info(f"📤 Queued triage task for ticket {ticket.id}")
         
-        return TicketResponse.model_validate(ticket)
+        return ticket
         
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Error creating ticket: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.get("", response_model=TicketListResponse)
-def list_tickets(
-    status: str = Query(None, description="Filter by status (pending|processing|completed|failed)"),
-    urgency: str = Query(None, description="Filter by urgency (High|Medium|Low)"),
-    category: str = Query(None, description="Filter by category (Billing|Technical|Feature Request|General)"),
-    ai_status: str = Query(None, description="Filter by AI status (success|fallback|error)"),
+async def list_tickets(
+    status: Optional[TicketStatus] = Query(None, description="Filter by status"),
+    urgency: Optional[UrgencyLevel] = Query(None, description="Filter by urgency"),
+    category: Optional[TicketCategory] = Query(None, description="Filter by category"),
+    ai_status: Optional[AIStatus] = Query(None, description="Filter by AI status"),
     created_after: datetime = Query(None, description="Filter tickets created after this datetime (ISO 8601)"),
     created_before: datetime = Query(None, description="Filter tickets created before this datetime (ISO 8601)"),
-    page: int = Query(1, ge=1, description="Page number (1-indexed)"),
+    page: int = Query(1, ge=1, description="Page number (1-indexed, ignored when cursor is set)"),
     per_page: int = Query(20, ge=1, le=100, description="Results per page"),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="Opaque cursor from pagination.next_cursor"),
+    include_total: bool = Query(False, description="Also return total count (runs COUNT query)"),
+    db: AsyncSession = Depends(get_db)
 ):
     """
     List tickets with filters and pagination.
@@ -90,81 +124,77 @@ def list_tickets(
     **Filters:**
     - status: pending|processing|completed|failed
     - urgency: High|Medium|Low
-    - category: Billing|Technical|Feature Request|General
+    - category: Billing|Technical|Feature Request
     - ai_status: success|fallback|error
     - created_after: ISO 8601 datetime
     - created_before: ISO 8601 datetime
     
-    **Pagination:**
-    - page: Page number (1-indexed, default 1)
+    Invalid enum values are rejected with 422.
+    
+    **Pagination (keyset):**
+    - cursor: Pass pagination.next_cursor to fetch the next page (preferred)
+    - page: Page number for offset fallback (1-indexed, default 1)
     - per_page: Results per page (1-100, default 20)
+    - include_total: Opt-in COUNT of matching tickets (default false)
     
     **Response:**
     - data: List of tickets (newest first)
-    - pagination: {total, page, per_page, total_pages, has_more}
+    - pagination: {page, per_page, has_more, next_cursor, total?, total_pages?}
     """
+    cursor_position = _decode_cursor(cursor) if cursor else None
+    
     try:
-        query = db.query(Ticket)
+        # TicketResponse uses every column and Ticket has no relationships, so the page
+        # is already one SELECT; raiseload guards against future N+1 lazy loads
+        query = select(Ticket).options(raiseload("*"))
         
-        # Apply filters (convert strings to Enum for PostgreSQL compatibility)
+        # Apply filters (query params are already coerced to Enums by FastAPI)
         if status:
-            try:
-                query = query.filter(Ticket.status == TicketStatus(status))
-            except ValueError:
-                # Invalid status value - return empty result
-                return TicketListResponse(
-                    data=[],
-                    pagination=PaginationMeta(total=0, page=page, per_page=per_page, total_pages=0, has_more=False)
-                )
+            query = query.where(Ticket.status == status)
         if urgency:
-            try:
-                query = query.filter(Ticket.urgency == UrgencyLevel(urgency))
-            except ValueError:
-                return TicketListResponse(
-                    data=[],
-                    pagination=PaginationMeta(total=0, page=page, per_page=per_page, total_pages=0, has_more=False)
-                )
+            query = query.where(Ticket.urgency == urgency)
         if category:
-            try:
-                query = query.filter(Ticket.category == TicketCategory(category))
-            except ValueError:
-                return TicketListResponse(
-                    data=[],
-                    pagination=PaginationMeta(total=0, page=page, per_page=per_page, total_pages=0, has_more=False)
-                )
+            query = query.where(Ticket.category == category)
         if ai_status:
-            try:
-                query = query.filter(Ticket.ai_status == AIStatus(ai_status))
-            except ValueError:
-                return TicketListResponse(
-                    data=[],
-                    pagination=PaginationMeta(total=0, page=page, per_page=per_page, total_pages=0, has_more=False)
-                )
+            query = query.where(Ticket.ai_status == ai_status)
         if created_after:
-            query = query.filter(Ticket.created_at >= created_after)
+            query = query.where(Ticket.created_at >= created_after)
         if created_before:
-            query = query.filter(Ticket.created_at <= created_before)
+            query = query.where(Ticket.created_at <= created_before)
         
-        # Count total
-        total = query.count()
+        # Count total only when explicitly requested (full scan of matching rows)
+        total = None
+        total_pages = None
+        if include_total:
+            total = await db.scalar(select(func.count()).select_from(query.subquery()))
+            total_pages = (total + per_page - 1) // per_page  # Ceiling division
         
-        # Calculate pagination
-        total_pages = (total + per_page - 1) // per_page  # Ceiling division
-        offset = (page - 1) * per_page
-        has_more = page < total_pages
+        # Seek past the cursor row instead of OFFSET scanning
+        if cursor_position:
+            query = query.where(tuple_(Ticket.created_at, Ticket.id) < cursor_position)
+        else:
+            query = query.offset((page - 1) * per_page)
         
-        # Get paginated results (newest first)
-        items = query.order_by(Ticket.created_at.desc()).offset(offset).limit(per_page).all()
+        # Get paginated results (newest first), over-fetch one row to detect more pages
+        result = await db.execute(
+            query.order_by(Ticket.created_at.desc(), Ticket.id.desc()).limit(per_page + 1)
+        )
+        items = result.scalars().all()
+        has_more = len(items) > per_page
+        items = items[:per_page]
         
-        return TicketListResponse(
-            data=[TicketResponse.model_validate(item) for item in items],
+        # Validate the page in one adapter call; model_construct skips re-validating
+        # the envelope and FastAPI passes the exact response_model instance through
+        return TicketListResponse.model_construct(
+            data=TICKET_LIST_ADAPTER.validate_python(items, from_attributes=True),
             pagination=PaginationMeta(
                 total=total,
                 page=page,
                 per_page=per_page,
                 total_pages=total_pages,
-                has_more=has_more
-            )
+                has_more=has_more,
+                next_cursor=_encode_cursor(items[-1]) if has_more else None
+            ),
         )
         
     except Exception as e:
@@ -172,20 +202,62 @@ def list_tickets(
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
+@router.get("/stats", response_model=TicketStatsResponse)
+async def get_ticket_stats(db: AsyncSession = Depends(get_db)):
+    """
+    Count tickets per status in one grouped query.
+    
+    Replaces polling the list endpoint once per status. Results are
+    cached in-process for STATS_CACHE_TTL_SECONDS.
+    """
+    global _stats_cache
+    now = time.monotonic()
+    if _stats_cache is not None and now - _stats_cache[0] < STATS_CACHE_TTL_SECONDS:
+        return _stats_cache[1]
+    
+    try:
+        result = await db.execute(
+            select(Ticket.status, func.count()).group_by(Ticket.status)
+        )
+        # NULL status rows (legacy/manual inserts) belong to no bucket
+        stats = TicketStatsResponse(**{
+            status.value: count for status, count in result.all() if status is not None
+        })
+        _stats_cache = (now, stats)
+        return stats
+        
+    except Exception as e:
+        logger.error(f"❌ Error counting tickets: {str(e)}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
 @router.get("/{ticket_id}", response_model=TicketResponse)
-def get_ticket(ticket_id: int, db: Session = Depends(get_db)):
+async def get_ticket(ticket_id: int, db: AsyncSession = Depends(get_db)):
     """
     Get single ticket detail by ID.
     
     Useful for polling ticket status during AI processing.
     Frontend can poll every 3 seconds until status != pending.
+    
+    Served from the Redis ticket cache when possible (short TTL,
+    invalidated on every write). Only settled tickets are cached: a
+    pending/processing read can race the worker's commit and invalidation,
+    and would then pin the stale status for the whole TTL.
     """
     try:
-        ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
+        cached = await get_cached_ticket(ticket_id)
+        if cached is not None:
+            return Response(content=cached, media_type="application/json")
+        
+        result = await db.execute(select(Ticket).where(Ticket.id == ticket_id))
+        ticket = result.scalars().first()
         if not ticket:
             raise HTTPException(status_code=404, detail="Ticket not found")
         
-        return TicketResponse.model_validate(ticket)
+        payload = TicketResponse.model_validate(ticket).model_dump_json()
+        if ticket.status in CACHEABLE_STATUSES:
+            await cache_ticket(ticket_id, payload)
+        return Response(content=payload, media_type="application/json")
         
     except HTTPException:
         raise
@@ -195,10 +267,10 @@ def get_ticket(ticket_id: int, db: Session = Depends(get_db)):
 
 
 @router.patch("/{ticket_id}", response_model=TicketResponse)
-def update_ticket(
+async def update_ticket(
     ticket_id: int,
     update_request: TicketUpdateRequest,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Update ticket (agent edits AI draft response).
@@ -207,33 +279,41 @@ def update_ticket(
     Original AI draft is preserved in ai_draft_response.
     """
     try:
-        ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-        if not ticket:
+        # Only agent's edited response is writable
+        values = {}
+        if update_request.agent_edited_response is not None:
+            values["agent_edited_response"] = update_request.agent_edited_response
+        
+        # Single UPDATE ... RETURNING (no prior SELECT, no post-commit refresh)
+        if values:
+            stmt = update(Ticket).where(Ticket.id == ticket_id).values(**values).returning(Ticket)
+        else:
+            stmt = select(Ticket).where(Ticket.id == ticket_id)
+        ticket = (await db.execute(stmt)).scalar_one_or_none()
+        if ticket is None:
             raise HTTPException(status_code=404, detail="Ticket not found")
         
-        # Update agent's edited response
-        if update_request.agent_edited_response is not None:
-            ticket.agent_edited_response = update_request.agent_edited_response
+        await db.commit()
         
-        db.commit()
-        db.refresh(ticket)
+        await invalidate_cached_ticket(ticket_id)
         
         logger.info(f"✅ Ticket {ticket_id} updated")
-        return TicketResponse.model_validate(ticket)
+        return ticket
         
     except HTTPException:
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Error updating ticket: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
 
 @router.post("/{ticket_id}/resolve", response_model=TicketResponse)
-def resolve_ticket(
+async def resolve_ticket(
     ticket_id: int,
     agent_id: str = Query(..., description="ID of agent resolving ticket"),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_db)
 ):
     """
     Mark ticket as resolved.
@@ -244,24 +324,32 @@ def resolve_ticket(
     - agent_id = provided agent ID
     """
     try:
-        ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-        if not ticket:
+        # Mark as resolved in a single UPDATE ... RETURNING (404 if no row matched)
+        stmt = (
+            update(Ticket)
+            .where(Ticket.id == ticket_id)
+            .values(
+                status=TicketStatus.COMPLETED,
+                agent_id=agent_id,
+                resolved_at=func.now(),
+            )
+            .returning(Ticket)
+        )
+        ticket = (await db.execute(stmt)).scalar_one_or_none()
+        if ticket is None:
             raise HTTPException(status_code=404, detail="Ticket not found")
         
-        # Mark as resolved
-        ticket.status = TicketStatus.COMPLETED
-        ticket.agent_id = agent_id
-        ticket.resolved_at = func.now()
+        await db.commit()
         
-        db.commit()
-        db.refresh(ticket)
+        await invalidate_cached_ticket(ticket_id)
         
         logger.info(f"✅ Ticket {ticket_id} resolved by {agent_id}")
-        return TicketResponse.model_validate(ticket)
+        return ticket
         
     except HTTPException:
+        await db.rollback()
         raise
     except Exception as e:
-        db.rollback()
+        await db.rollback()
         logger.error(f"❌ Error resolving ticket: {str(e)}")
         raise HTTPException(status_code=500, detail="Internal server error")
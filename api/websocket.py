@@ -2,68 +2,210 @@
 
 import logging
 import asyncio
-import json
+import orjson
 from collections import defaultdict
 from fastapi import APIRouter, WebSocket, WebSocketDisconnect
-from typing import List, Dict, Set
+from typing import Awaitable, Callable, Iterable, List, Dict, Optional, Set, Union
+from redis.exceptions import RedisError
+from pydantic import ValidationError
+from sqlalchemy import select
 
-from app.pubsub import subscribe_ticket_updates_async
-from fastapi.concurrency import run_in_threadpool
+from app.config import settings
+from app.pubsub import TicketUpdateSubscriber
+from app.database import AsyncSessionLocal
+from models.schemas import (
+    TICKET_LIST_ADAPTER,
+    WS_CLIENT_MESSAGE_ADAPTER,
+    WSPingMessage,
+    WSTicketsMessage,
+)
+from models.ticket import Ticket
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# Sockets served per flush before yielding to the event loop
+FLUSH_YIELD_EVERY = 50
+
+
+class WebSocketOutbox:
+    """
+    Per-connection bounded send queue that coalesces frames.
+    
+    Frames queued during the same event-loop tick are flushed together.
+    Every frame on the wire is a JSON array of messages (even for a
+    single message) so clients parse one shape.
+    A slow socket only fills its own queue; on overflow the oldest frame is
+    dropped so broadcasts never wait on one consumer's TCP window.
+    """
+    
+    def __init__(
+        self,
+        websocket: WebSocket,
+        maxsize: int = 0,
+        on_error: Optional[Callable[[WebSocket], Awaitable[None]]] = None,
+    ):
+        self.websocket = websocket
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=maxsize)
+        self.on_error = on_error
+        self.task: Optional[asyncio.Task] = None
+    
+    def start(self):
+        self.task = asyncio.create_task(self._drain())
+    
+    def send(self, data: dict):
+        """Encode and queue a message without waiting for the socket write."""
+        # orjson is faster than WebSocket.send_json's stdlib encoder
+        self.send_frame(orjson.dumps(data).decode())
+    
+    def send_frame(self, frame: str):
+        """Queue an already-encoded JSON message (shared across sockets)."""
+        try:
+            self.queue.put_nowait(frame)
+        except asyncio.QueueFull:
+            self.queue.get_nowait()  # Drop oldest
+            self.queue.put_nowait(frame)
+            logger.warning("⚠️ WebSocket send queue full, dropped oldest frame")
+    
+    async def _drain(self):
+        while True:
+            batch = [await self.queue.get()]
+            while not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+            text = "[" + ",".join(batch) + "]"
+            try:
+                await self.websocket.send_text(text)
+            except Exception as e:
+                logger.error(f"❌ Error sending to socket: {e}")
+                # Stop routing updates to a dead socket; endpoint's disconnect() finishes cleanup
+                if self.on_error:
+                    await self.on_error(self.websocket)
+                return
+    
+    async def close(self):
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+            self.task = None
+
 
 class ConnectionManager:
     """Manages WebSocket connections and broadcasts status updates."""
     
     def __init__(self):
-        # ticket_id -> set of websockets
-        self.active_connections: Dict[int, Set[WebSocket]] = defaultdict(set)
+        # ticket_id -> set of websockets (plain dicts: reads never create entries,
+        # only subscribe() adds keys via setdefault)
+        self.active_connections: Dict[int, Set[WebSocket]] = {}
+        # websocket -> set of ticket_ids (reverse index for O(subscriptions) disconnect)
+        self.ws_to_tickets: Dict[WebSocket, Set[int]] = {}
         # Keep track of anonymous/general connections if needed (future use)
         self.all_connections: Set[WebSocket] = set()
+        # websocket -> its bounded send queue (all server -> client frames go here)
+        self.outboxes: Dict[WebSocket, WebSocketOutbox] = {}
         # Background task for Redis subscription
         self.redis_task = None
+        # Per-ticket Redis channel subscriptions (refcounted via active_connections)
+        self.subscriber: Optional[TicketUpdateSubscriber] = None
+        # Serializes start/stop of the subscriber task across connect/disconnect
+        self._task_lock = asyncio.Lock()
+        # ticket_id -> latest update data waiting for the next flush
+        self._pending: Dict[int, dict] = {}
+        self._flush_task: Optional[asyncio.Task] = None
         
     async def connect(self, websocket: WebSocket):
         """Accept connection and start Redis listener if needed."""
         await websocket.accept()
         self.all_connections.add(websocket)
-        logger.info(f"🔌 WebSocket connected. Total: {len(self.all_connections)}")
+        outbox = WebSocketOutbox(
+            websocket,
+            maxsize=settings.WS_SEND_QUEUE_SIZE,
+            on_error=self._drop_subscriptions,
+        )
+        outbox.start()
+        self.outboxes[websocket] = outbox
+        logger.info("🔌 WebSocket connected. Total: %d", len(self.all_connections))
         
-        # Start Redis listener lazily on first connection
-        if not self.redis_task:
-            logger.info("🚀 Starting Redis Subscriber Task")
-            self.redis_task = asyncio.create_task(
-                subscribe_ticket_updates_async(self.broadcast_ticket_update)
-            )
+        # Start Redis listener lazily on first connection (or if it died)
+        async with self._task_lock:
+            if self.redis_task is None or self.redis_task.done():
+                logger.info("🚀 Starting Redis Subscriber Task")
+                self.subscriber = TicketUpdateSubscriber(self.broadcast_ticket_update)
+                self.redis_task = asyncio.create_task(self.subscriber.run())
+                # Re-subscribe channels for sockets still watching tickets
+                if not await self._redis_subscribe(list(self.active_connections)):
+                    # Watched tickets have no channel: mark the subscriber dead
+                    # so the next connect() restarts and resubscribes
+                    self.redis_task.cancel()
 
     async def disconnect(self, websocket: WebSocket):
         """Remove connection from all tracking sets."""
         self.all_connections.discard(websocket)
+        outbox = self.outboxes.pop(websocket, None)
+        if outbox:
+            await outbox.close()
         
-        # Remove from ticket subscriptions
-        # Efficient enough for small scale; optimize map if needed
-        for ticket_id in list(self.active_connections.keys()):
-            if websocket in self.active_connections[ticket_id]:
-                self.active_connections[ticket_id].discard(websocket)
-                if not self.active_connections[ticket_id]:
-                    del self.active_connections[ticket_id]
+        await self._drop_subscriptions(websocket)
         
-        logger.info(f"🔌 WebSocket disconnected. Total: {len(self.all_connections)}")
+        logger.info("🔌 WebSocket disconnected. Total: %d", len(self.all_connections))
         
-        # Cleanup Redis task if no connections left
-        if not self.all_connections and self.redis_task:
-            logger.info("🛑 No active connections. Stopping Redis Subscriber Task...")
-            self.redis_task.cancel()
-            try:
-                await self.redis_task
-            except asyncio.CancelledError:
-                logger.info("✅ Redis Subscriber Task cancelled successfully")
-            self.redis_task = None
+        # Cleanup Redis task if no connections left; the lock keeps a concurrent
+        # connect() from reusing a task that is being cancelled here
+        async with self._task_lock:
+            if not self.all_connections and self.redis_task:
+                logger.info("🛑 No active connections. Stopping Redis Subscriber Task...")
+                self.redis_task.cancel()
+                try:
+                    await self.redis_task
+                except asyncio.CancelledError:
+                    logger.info("✅ Redis Subscriber Task cancelled successfully")
+                self.redis_task = None
+                self.subscriber = None
+
+    async def _drop_subscriptions(self, websocket: WebSocket):
+        """Remove socket from ticket subscriptions (only the tickets it joined)."""
+        emptied = []
+        for ticket_id in self.ws_to_tickets.pop(websocket, ()):
+            connections = self.active_connections.get(ticket_id)
+            if connections is None:
+                continue
+            connections.discard(websocket)
+            if not connections:
+                del self.active_connections[ticket_id]
+                emptied.append(ticket_id)
+        await self._redis_unsubscribe(emptied)
+
+    async def _redis_subscribe(self, ticket_ids: Iterable[int]) -> bool:
+        """Subscribe this process to Redis channels of already watched tickets."""
+        if self.subscriber is None:
+            return True
+        try:
+            await self.subscriber.subscribe(ticket_ids)
+            return True
+        except RedisError as e:
+            logger.error(f"❌ Failed to subscribe to ticket channels: {e}")
+            return False
+
+    async def _redis_unsubscribe(self, ticket_ids: Iterable[int]):
+        """Unsubscribe from Redis channels of tickets no local socket watches."""
+        if self.subscriber is None:
+            return
+        try:
+            await self.subscriber.unsubscribe(ticket_ids)
+        except RedisError as e:
+            logger.error(f"❌ Failed to unsubscribe from ticket channels: {e}")
 
     async def shutdown(self):
         """Cleanup resources on application shutdown."""
+        if self._flush_task:
+            self._flush_task.cancel()
+            self._flush_task = None
+        self._pending.clear()
+        for outbox in list(self.outboxes.values()):
+            await outbox.close()
+        self.outboxes.clear()
         if self.redis_task:
             logger.info("🛑 Application Shutdown: Stopping Redis Subscriber Task...")
             self.redis_task.cancel()
@@ -77,50 +219,204 @@ class ConnectionManager:
         # for ws in list(self.all_connections):
         #     await ws.close()
 
-    async def subscribe(self, websocket: WebSocket, ticket_ids: List[int]):
-        """Subscribe socket to specific ticket IDs."""
+    async def subscribe(self, websocket: WebSocket, ticket_ids: List[int]) -> bool:
+        """
+        Subscribe socket to specific ticket IDs.
+        
+        Returns False (and subscribes nothing) if the socket would exceed
+        WS_MAX_SUBSCRIPTIONS_PER_SOCKET. Raises RedisError (and records
+        nothing) if the Redis channels could not be subscribed, so a client
+        retry treats the tickets as new again.
+        """
+        current = self.ws_to_tickets.get(websocket, set())
+        if len(current.union(ticket_ids)) > settings.WS_MAX_SUBSCRIPTIONS_PER_SOCKET:
+            return False
+        # First local watcher of a ticket -> subscribe this process to its channel
+        # before recording it; a ticket left in active_connections without a
+        # channel would never be retried (it is no longer "newly watched")
+        newly_watched = {tid for tid in ticket_ids if tid not in self.active_connections}
+        if newly_watched and self.subscriber is not None:
+            try:
+                await self.subscriber.subscribe(newly_watched)
+            except RedisError as e:
+                logger.error(f"❌ Failed to subscribe to ticket channels: {e}")
+                raise
         for tid in ticket_ids:
-            self.active_connections[tid].add(websocket)
-        logger.info(f"📝 Socket subscribed to tickets: {ticket_ids}")
+            self.active_connections.setdefault(tid, set()).add(websocket)
+        self.ws_to_tickets.setdefault(websocket, set()).update(ticket_ids)
+        logger.debug("📝 Socket subscribed to tickets: %s", ticket_ids)
+        return True
         
     async def unsubscribe(self, websocket: WebSocket, ticket_ids: List[int]):
         """Unsubscribe socket from specific ticket IDs."""
+        subscribed = self.ws_to_tickets.get(websocket)
+        emptied = []
         for tid in ticket_ids:
             if tid in self.active_connections:
                 self.active_connections[tid].discard(websocket)
-        logger.info(f"📝 Socket unsubscribed from tickets: {ticket_ids}")
+                if not self.active_connections[tid]:
+                    del self.active_connections[tid]
+                    emptied.append(tid)
+            if subscribed is not None:
+                subscribed.discard(tid)
+        if subscribed is not None and not subscribed:
+            del self.ws_to_tickets[websocket]
+        await self._redis_unsubscribe(emptied)
+        logger.debug("📝 Socket unsubscribed from tickets: %s", ticket_ids)
 
     async def broadcast_ticket_update(self, data: dict):
         """
         Callback triggered by Redis Pub/Sub.
-        Broadcasts update to clients subscribed to this ticket_id.
+        Queues the update and schedules a flush after WS_BROADCAST_WINDOW_MS,
+        so bursts for the same ticket collapse to the latest state.
         """
         ticket_id = data.get("ticket_id")
-        if not ticket_id:
+        if not ticket_id or ticket_id not in self.active_connections:
             return
-            
-        if ticket_id in self.active_connections:
-            message = {
-                "type": "ticket_updated",
-                "data": data["data"]
-            }
-            
-            # Broadcast to all interested connections
-            # Clone set to safe iterate in case of disconnect during send
-            subscribers = list(self.active_connections[ticket_id])
-            if subscribers:
-                logger.info(f"📢 Broadcasting update for ticket {ticket_id} to {len(subscribers)} clients")
-                for connection in subscribers:
-                    try:
-                        await connection.send_json(message)
-                    except Exception as e:
-                        logger.error(f"❌ Error sending to socket: {e}")
-                        # Cleanup handled by disconnect() usually, but safe to ignore here
+        
+        self._pending[ticket_id] = data["data"]
+        if self._flush_task is None:
+            self._flush_task = asyncio.create_task(
+                self._flush_after(settings.WS_BROADCAST_WINDOW_MS / 1000)
+            )
+
+    async def _flush_after(self, delay: float):
+        """Wait out the coalescing window, then deliver pending updates."""
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._flush_task = None
+        await self.flush_pending()
+
+    async def flush_pending(self):
+        """
+        Queue pending updates on each socket's outbox: one message per socket.
+        
+        A socket with a single pending update gets the usual ticket_updated
+        message; several are sent as {"type": "ticket_batch", "updates": [...]}.
+        """
+        pending, self._pending = self._pending, {}
+        
+        # Group updates per socket via the ticket -> sockets buckets
+        per_socket: Dict[WebSocket, List[int]] = defaultdict(list)
+        for ticket_id in pending:
+            for connection in self.active_connections.get(ticket_id, ()):
+                per_socket[connection].append(ticket_id)
+        if not per_socket:
+            return
+        
+        # Serialize once per distinct update set and share the frame across sockets
+        frames: Dict[tuple, str] = {}
+        for sent, (connection, ticket_ids) in enumerate(per_socket.items(), 1):
+            # Yield periodically so a large fan-out doesn't starve other tasks
+            if sent % FLUSH_YIELD_EVERY == 0:
+                await asyncio.sleep(0)
+            outbox = self.outboxes.get(connection)
+            if outbox is None:
+                continue
+            key = tuple(ticket_ids)
+            frame = frames.get(key)
+            if frame is None:
+                if len(key) == 1:
+                    message = {"type": "ticket_updated", "data": pending[key[0]]}
+                else:
+                    message = {"type": "ticket_batch", "updates": [pending[tid] for tid in key]}
+                frame = frames[key] = orjson.dumps(message).decode()
+            # Non-blocking: each socket's pump drains its own queue
+            outbox.send_frame(frame)
+        
+        # Hot path: skip record creation entirely unless DEBUG is on
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📢 Broadcasting %d ticket update(s) to %d clients", len(pending), len(per_socket))
 
 
 manager = ConnectionManager()
 
 
+async def receive_frame(websocket: WebSocket) -> Union[str, bytes]:
+    """
+    Receive one raw text or binary frame without decoding it.
+    
+    Unlike receive_text/receive_json this accepts both frame kinds, and the
+    payload goes straight to pydantic-core's JSON parser.
+    """
+    message = await websocket.receive()
+    if message["type"] == "websocket.disconnect":
+        raise WebSocketDisconnect(message.get("code", 1000), message.get("reason"))
+    text = message.get("text")
+    return text if text is not None else message.get("bytes") or b""
+
+
+def _client_message_error(exc: ValidationError) -> str:
+    """Map a client message validation failure to the protocol error text."""
+    error = exc.errors()[0]
+    if error["type"] == "json_invalid":
+        return "Invalid JSON format"
+    if error["type"] in ("union_tag_invalid", "union_tag_not_found"):
+        return f"Unknown action: {(error.get('ctx') or {}).get('tag')}"
+    if error["type"] == "too_long":
+        return f"Too many ticket_ids (max {settings.WS_MAX_TICKET_IDS_PER_MESSAGE} per message)"
+    if error["loc"][-1:] == ("ticket_ids",):
+        return "ticket_ids must be a list of integers"
+    if "ticket_ids" in error["loc"]:
+        return "All ticket_ids must be valid integers"
+    return "Invalid message format"
+
+
+# Pre-encoded keepalive reply: pings allocate nothing beyond the queue slot
+_PONG_FRAME = orjson.dumps({"type": "pong"}).decode()
+
+
+async def _handle_subscribe(websocket: WebSocket, outbox: WebSocketOutbox, msg: WSTicketsMessage):
+    ticket_ids = msg.ticket_ids
+    try:
+        subscribed = await manager.subscribe(websocket, ticket_ids)
+    except RedisError:
+        outbox.send({
+            "type": "error",
+            "message": "Subscription failed, please retry"
+        })
+        return
+    if not subscribed:
+        outbox.send({
+            "type": "error",
+            "message": f"Subscription limit reached (max {settings.WS_MAX_SUBSCRIPTIONS_PER_SOCKET} tickets)"
+        })
+        return
+    # Snapshot Strategy: Send current state immediately to avoid race conditions
+    # This guarantees the client has the latest state even if they missed the "Processing" broadcast
+    # Never raises: a failed fetch is logged and yields no snapshots
+    snapshots = await fetch_ticket_snapshots(ticket_ids)
+
+    # Ack subscription; queued with the snapshots so they share one frame
+    outbox.send({
+        "type": "subscribed",
+        "ticket_ids": ticket_ids
+    })
+    if snapshots:
+        logger.debug("📸 Sending initial snapshots for %d tickets", len(snapshots))
+        outbox.send({
+            "type": "ticket_snapshot_batch",
+            "data": snapshots
+        })
+
+
+async def _handle_unsubscribe(websocket: WebSocket, outbox: WebSocketOutbox, msg: WSTicketsMessage):
+    await manager.unsubscribe(websocket, msg.ticket_ids)
+
+
+async def _handle_ping(websocket: WebSocket, outbox: WebSocketOutbox, msg: WSPingMessage):
+    outbox.send_frame(_PONG_FRAME)
+
+
+# action -> handler; unknown actions never get here (rejected by WS_CLIENT_MESSAGE_ADAPTER)
+_HANDLERS = {
+    "subscribe": _handle_subscribe,
+    "unsubscribe": _handle_unsubscribe,
+    "ping": _handle_ping,
+}
+
+
 @router.websocket("/ws/tickets")
 async def websocket_endpoint(websocket: WebSocket):
     """
@@ -128,90 +424,36 @@ async def websocket_endpoint(websocket: WebSocket):
     
     Protocol:
     - Client sends: {"action": "subscribe", "ticket_ids": [1, 2]}
+    - Client sends: {"action": "unsubscribe", "ticket_ids": [1]}
     - Client sends: {"action": "ping"}
     - Server sends: {"type": "ticket_updated", "data": {...}}
+    - Server sends: {"type": "ticket_batch", "updates": [{...}, ...]}
+    - Server sends: {"type": "ticket_snapshot_batch", "data": [{...}, ...]} (after subscribe)
     - Server sends: {"type": "pong"}
+    - Server sends: {"type": "error", "message": "..."} for invalid messages,
+      including subscribe/unsubscribe with non-integer ticket_ids, and when
+      a subscribe could not be registered with Redis (safe to retry)
+    
+    Every server frame is a JSON array of these messages; replies produced
+    together (e.g. a subscribe ack and its snapshots) share one frame.
     """
     await manager.connect(websocket)
+    outbox = manager.outboxes[websocket]
     try:
         while True:
             try:
-                data = await websocket.receive_json()
-            except json.JSONDecodeError:
-                await websocket.send_json({
+                msg = WS_CLIENT_MESSAGE_ADAPTER.validate_json(await receive_frame(websocket))
+            except ValidationError as e:
+                outbox.send({
                     "type": "error",
-                    "message": "Invalid JSON format"
+                    "message": _client_message_error(e)
                 })
                 continue
             except WebSocketDisconnect:
                 # Re-raise to be handled by outer block
                 raise
-                
-            action = data.get("action")
-            
-            if action == "subscribe":
-                raw_ids = data.get("ticket_ids", [])
-                
-                # Validate input is a list
-                if not isinstance(raw_ids, list):
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": "ticket_ids must be a list of integers"
-                    })
-                    continue
-                
-                # Validate and convert all IDs to integers
-                try:
-                    ticket_ids = [int(x) for x in raw_ids]
-                except (ValueError, TypeError):
-                    await websocket.send_json({
-                        "type": "error",
-                        "message": "All ticket_ids must be valid integers"
-                    })
-                    continue
-
-                await manager.subscribe(websocket, ticket_ids)
-                # Ack subscription
-                await websocket.send_json({
-                    "type": "subscribed",
-                    "ticket_ids": ticket_ids
-                })
-
-                # Snapshot Strategy: Send current state immediately to avoid race conditions
-                # This guarantees the client has the latest state even if they missed the "Processing" broadcast
-                try:
-                    snapshots = await run_in_threadpool(fetch_ticket_snapshots, ticket_ids)
-                    if snapshots:
-                        logger.info(f"📸 Sending initial snapshots for {len(snapshots)} tickets")
-                        for snapshot in snapshots:
-                            await websocket.send_json({
-                                "type": "ticket_updated",
-                                "data": snapshot
-                            })
-                except Exception as e:
-                    logger.error(f"⚠️ Failed to send snapshots: {e}")
-                    
-            elif action == "unsubscribe":
-                raw_ids = data.get("ticket_ids", [])
-                if isinstance(raw_ids, list):
-                     # Best effort unsubscribe, safe to ignore invalid ints here usually allowing partials,
-                     # but for consistency we can filter valid ones
-                    ticket_ids = []
-                    for x in raw_ids:
-                        try:
-                            ticket_ids.append(int(x))
-                        except (ValueError, TypeError):
-                            pass
-                    await manager.unsubscribe(websocket, ticket_ids)
             
-            elif action == "ping":
-                await websocket.send_json({"type": "pong"})
-                
-            else:
-                await websocket.send_json({
-                    "type": "error", 
-                    "message": f"Unknown action: {action}"
-                })
+            await _HANDLERS[msg.action](websocket, outbox, msg)
                 
     except WebSocketDisconnect:
         await manager.disconnect(websocket)
@@ -220,20 +462,17 @@ async def websocket_endpoint(websocket: WebSocket):
         await manager.disconnect(websocket)
 
 
-def fetch_ticket_snapshots(ticket_ids: List[int]) -> List[dict]:
-    """Helper to fetch current ticket states synchronously."""
-    from app.database import SessionLocal
-    from models.ticket import Ticket
-    from models.schemas import TicketResponse
-    
-    results = []
+async def fetch_ticket_snapshots(ticket_ids: List[int]) -> List[dict]:
+    """Helper to fetch current ticket states on the event loop (AsyncSession); [] on error."""
     try:
-        with SessionLocal() as db:
-            tickets = db.query(Ticket).filter(Ticket.id.in_(ticket_ids)).all()
-            for ticket in tickets:
-                # Serialize using Pydantic model
-                data = json.loads(TicketResponse.model_validate(ticket).model_dump_json())
-                results.append(data)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(select(Ticket).where(Ticket.id.in_(ticket_ids)))
+            tickets = result.scalars().all()
+            # One adapter call for all rows, dumped to JSON-safe dicts
+            return TICKET_LIST_ADAPTER.dump_python(
+                TICKET_LIST_ADAPTER.validate_python(tickets, from_attributes=True),
+                mode="json",
+            )
     except Exception as e:
         logger.error(f"Snapshot fetch error: {e}")
-    return results
+        return []
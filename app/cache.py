@@ -0,0 +1,127 @@
+"""Redis read-through cache for hot ticket reads.
+
+GET /api/tickets/{id} is polled every few seconds by the frontend while AI
+processing runs. Serialized TicketResponse JSON is cached under
+ticket:cache:{id} with a short TTL and deleted whenever the ticket changes
+(only completed/failed tickets are cached, so a read racing the worker's
+commit can't pin a stale pending/processing status):
+- API (update/resolve) invalidates after commit
+- Huey Worker invalidates as part of publish_ticket_update
+
+Cache errors never fail a request; callers fall back to PostgreSQL.
+The same pooled client also serves /health/deep Redis pings.
+
+The Huey worker also caches AI triage results under ai:triage:{hash} so
+identical complaints skip the Gemini call across worker processes.
+"""
+
+import logging
+from functools import lru_cache
+from typing import Optional
+
+import redis
+import redis.asyncio as redis_async
+from redis.exceptions import RedisError
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+_async_client: Optional[redis_async.Redis] = None
+
+
+def ticket_cache_key(ticket_id: int) -> str:
+    """Redis key holding the cached TicketResponse JSON for a ticket."""
+    return f"ticket:cache:{ticket_id}"
+
+
+def get_async_client() -> redis_async.Redis:
+    """Get shared async Redis client (created lazily on first use)."""
+    global _async_client
+    if _async_client is None:
+        _async_client = redis_async.from_url(
+            settings.REDIS_URL,
+            decode_responses=True,
+            socket_connect_timeout=1,
+            socket_timeout=1,
+            health_check_interval=30,
+        )
+    return _async_client
+
+
+async def close_async_client() -> None:
+    """Close the shared async Redis client (application shutdown)."""
+    global _async_client
+    if _async_client is not None:
+        await _async_client.aclose()
+        _async_client = None
+
+
+async def get_cached_ticket(ticket_id: int) -> Optional[str]:
+    """Return cached ticket JSON, or None on miss or Redis error."""
+    try:
+        return await get_async_client().get(ticket_cache_key(ticket_id))
+    except RedisError as e:
+        logger.warning(f"⚠️ Ticket cache read failed for {ticket_id}: {e}")
+        return None
+
+
+async def cache_ticket(ticket_id: int, payload: str) -> None:
+    """Store ticket JSON with TICKET_CACHE_TTL_SECONDS expiry (best effort)."""
+    try:
+        await get_async_client().setex(
+            ticket_cache_key(ticket_id), settings.TICKET_CACHE_TTL_SECONDS, payload
+        )
+    except RedisError as e:
+        logger.warning(f"⚠️ Ticket cache write failed for {ticket_id}: {e}")
+
+
+async def invalidate_cached_ticket(ticket_id: int) -> None:
+    """Drop cached ticket JSON after a write (best effort; TTL bounds staleness)."""
+    try:
+        await get_async_client().delete(ticket_cache_key(ticket_id))
+    except RedisError as e:
+        logger.warning(f"⚠️ Ticket cache invalidation failed for {ticket_id}: {e}")
+
+
+def triage_cache_key(complaint_hash: str) -> str:
+    """Redis key holding cached AITriageResponse JSON for a complaint hash."""
+    return f"ai:triage:{complaint_hash}"
+
+
+@lru_cache(maxsize=1)
+def get_sync_client() -> redis.Redis:
+    """Get shared sync Redis client for worker-side caching (fails fast)."""
+    return redis.from_url(
+        settings.REDIS_URL,
+        decode_responses=True,
+        socket_connect_timeout=1,
+        socket_timeout=1,
+    )
+
+
+def get_cached_triage(complaint_hash: str) -> Optional[str]:
+    """Return cached triage JSON, or None on miss or Redis error."""
+    try:
+        return get_sync_client().get(triage_cache_key(complaint_hash))
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Triage cache read failed: {e}")
+        return None
+
+
+def cache_triage(complaint_hash: str, payload: str) -> None:
+    """Store triage JSON with TRIAGE_CACHE_TTL_SECONDS expiry (best effort)."""
+    try:
+        get_sync_client().setex(
+            triage_cache_key(complaint_hash), settings.TRIAGE_CACHE_TTL_SECONDS, payload
+        )
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Triage cache write failed: {e}")
+
+
+def invalidate_triage(complaint_hash: str) -> None:
+    """Drop a cached triage entry that no longer validates (best effort)."""
+    try:
+        get_sync_client().delete(triage_cache_key(complaint_hash))
+    except redis.RedisError as e:
+        logger.warning(f"⚠️ Triage cache invalidation failed: {e}")
@@ -1,5 +1,7 @@
 """Configuration management using Pydantic Settings."""
 
+from functools import lru_cache
+
 from pydantic import ConfigDict
 from pydantic_settings import BaseSettings
 
@@ -20,6 +22,8 @@ class Settings(BaseSettings):
     DB_POOL_SIZE: int = 20
     DB_MAX_OVERFLOW: int = 30
     DB_POOL_TIMEOUT: int = 30
+    DB_POOL_RECYCLE: int = 1800  # Seconds before a pooled connection is replaced
+    DB_POOL_PRE_PING: bool = False  # SELECT 1 on every checkout (extra round-trip)
     
     # Redis (for Huey task queue in production)
     REDIS_URL: str = "redis://localhost:6379"
@@ -27,6 +31,7 @@ class Settings(BaseSettings):
     # Google Gemini API (FREE tier)
     GOOGLE_API_KEY: str
     GOOGLE_MODEL: str = "gemini-2.5-flash"
+    TRIAGE_CACHE_TTL_SECONDS: int = 3600  # Reuse results for repeated complaints (0 = off)
     
     # CORS Configuration
     CORS_ORIGINS: str = "http://localhost:3000,http://127.0.0.1:3000"
@@ -36,20 +41,34 @@ class Settings(BaseSettings):
     DEBUG: bool = False  # Default False for security; enable explicitly in dev
     
     # Huey Worker Settings
-    HUEY_WORKERS: int = 2
+    HUEY_WORKERS: int = 2  # Consumer threads (-w); also sizes the sync DB pool
+    HUEY_WORKER_TYPE: str = "thread"  # Consumer -k: thread | greenlet | process
     HUEY_INITIAL_DELAY: int = 100  # milliseconds
+    STUCK_TICKET_TIMEOUT_SECONDS: int = 300  # PROCESSING longer than this is requeued
     
     # API Settings
     API_TIMEOUT_SECONDS: int = 30  # External API call timeout
     
     # Rate Limiting (requests per minute per IP)
     RATE_LIMIT_PER_MINUTE: int = 30  # Conservative to protect Gemini quota (60/min)
+    
+    # Ticket read cache (GET /api/tickets/{id} polling)
+    TICKET_CACHE_TTL_SECONDS: int = 10
+    
+    # WebSocket Limits (bound per-connection memory)
+    WS_MAX_TICKET_IDS_PER_MESSAGE: int = 100
+    WS_MAX_SUBSCRIPTIONS_PER_SOCKET: int = 1000
+    WS_SEND_QUEUE_SIZE: int = 256  # Per-socket frames buffered before dropping oldest
+    WS_BROADCAST_WINDOW_MS: int = 30  # Coalesce bursts of ticket updates (latest wins)
 
 
 settings = Settings()
 
 
-def get_cors_origins_list() -> list[str]:
-    """Parse CORS_ORIGINS string into list."""
-    return [origin.strip() for origin in settings.CORS_ORIGINS.split(",")]
+@lru_cache(maxsize=1)
+def get_cors_origins_list() -> tuple[str, ...]:
+    """Parse CORS_ORIGINS string once into an immutable tuple of origins."""
+    return tuple(
+        origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()
+    )
 
@@ -1,33 +1,66 @@
 """Database connection and session management."""
 
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base, sessionmaker
 from app.config import settings
 
 # Create database engine with connection pooling
+# Sync engine is used by the Huey worker, migrations and schema creation.
+# Each worker thread holds one session per task, so the steady-state pool is
+# one connection per worker (overflow covers startup/schema work).
 engine = create_engine(
     settings.DATABASE_URL,
     echo=settings.DEBUG,  # SQL logging in debug mode
+    pool_size=settings.HUEY_WORKERS,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,  # Off by default: recycle instead of a ping per checkout
+    pool_recycle=settings.DB_POOL_RECYCLE,     # Replace connections before server/proxy idle timeouts
+    pool_reset_on_return="rollback",
+    pool_timeout=settings.DB_POOL_TIMEOUT,
+)
+
+# Session factory (expire_on_commit=False: worker reads RETURNING rows, no reloads)
+SessionLocal = sessionmaker(autocommit=False, autoflush=False, expire_on_commit=False, bind=engine)
+
+
+def get_async_database_url(url: str) -> str:
+    """Map a sync DATABASE_URL onto its asyncio driver (postgresql -> asyncpg)."""
+    parsed = make_url(url)
+    if parsed.get_backend_name() == "postgresql":
+        parsed = parsed.set(drivername="postgresql+asyncpg")
+    return parsed.render_as_string(hide_password=False)
+
+
+# Async engine for FastAPI endpoints (frees the event loop during DB I/O)
+async_engine = create_async_engine(
+    get_async_database_url(settings.DATABASE_URL),
+    echo=settings.DEBUG,
     pool_size=settings.DB_POOL_SIZE,
     max_overflow=settings.DB_MAX_OVERFLOW,
-    pool_pre_ping=True,   # Test connection health before using
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+    pool_recycle=settings.DB_POOL_RECYCLE,
+    pool_reset_on_return="rollback",
     pool_timeout=settings.DB_POOL_TIMEOUT,
 )
 
-# Session factory
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# Async session factory (expire_on_commit=False: no implicit lazy reloads after commit)
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
 
 # Base class for ORM models
 Base = declarative_base()
 
 
-def get_db():
+async def get_db():
     """
     Dependency function for FastAPI endpoints.
-    Provides database session with automatic cleanup.
+    Provides async database session with automatic cleanup.
     """
-    db = SessionLocal()
-    try:
+    async with AsyncSessionLocal() as db:
         yield db
-    finally:
-        db.close()
@@ -1,11 +1,16 @@
 """Centralized logging configuration with file rotation."""
 
 import logging
-from logging.handlers import TimedRotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, TimedRotatingFileHandler
 from pathlib import Path
+from typing import Optional
 
 from app.config import settings
 
+# Background thread that does the actual console/file I/O
+_listener: Optional[QueueListener] = None
+
 
 def setup_logging(log_dir: str = "logs") -> None:
     """
@@ -17,6 +22,8 @@ def setup_logging(log_dir: str = "logs") -> None:
     - Separate error log file
     - Consistent format across handlers
     - Graceful fallback to console-only if file handlers fail
+    - Handlers run on a QueueListener thread; callers (incl. the event loop)
+      only enqueue records
     
     Args:
         log_dir: Directory for log files (default: ./logs)
@@ -31,13 +38,15 @@ def setup_logging(log_dir: str = "logs") -> None:
     root_logger.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
     
     # Clear existing handlers to avoid duplicates on reload
+    stop_logging()
     root_logger.handlers.clear()
+    handlers = []
     
     # 1. Console Handler (stdout - for Docker) - Always configured
     console_handler = logging.StreamHandler()
     console_handler.setLevel(logging.DEBUG if settings.DEBUG else logging.INFO)
     console_handler.setFormatter(formatter)
-    root_logger.addHandler(console_handler)
+    handlers.append(console_handler)
     
     # 2. File Handlers (with graceful fallback)
     try:
@@ -57,7 +66,7 @@ def setup_logging(log_dir: str = "logs") -> None:
         file_handler.setLevel(logging.INFO)
         file_handler.setFormatter(formatter)
         file_handler.suffix = "%Y-%m-%d"  # app.log.2026-01-31
-        root_logger.addHandler(file_handler)
+        handlers.append(file_handler)
         
         # Error-only File Handler (for quick error review)
         error_log_file = log_path / "error.log"
@@ -71,15 +80,34 @@ def setup_logging(log_dir: str = "logs") -> None:
         error_handler.setLevel(logging.ERROR)
         error_handler.setFormatter(formatter)
         error_handler.suffix = "%Y-%m-%d"
-        root_logger.addHandler(error_handler)
-        
-        logging.info(f"📋 Logging initialized: console + file rotation ({log_dir}/)")
+        handlers.append(error_handler)
+        file_error = None
         
     except (OSError, IOError, Exception) as e:
         # Fallback: Continue with console-only logging
-        logging.warning(f"⚠️ File logging unavailable ({e}), using console-only mode")
+        file_error = e
+    
+    # 3. Queue Handler: log calls only enqueue, the listener thread writes
+    global _listener
+    log_queue: queue.Queue = queue.Queue(-1)
+    root_logger.addHandler(QueueHandler(log_queue))
+    _listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _listener.start()
+    
+    if file_error is None:
+        logging.info(f"📋 Logging initialized: console + file rotation ({log_dir}/)")
+    else:
+        logging.warning(f"⚠️ File logging unavailable ({file_error}), using console-only mode")
     
     # Silence noisy third-party loggers
     logging.getLogger("uvicorn.access").setLevel(logging.WARNING)
     logging.getLogger("httpx").setLevel(logging.WARNING)
     logging.getLogger("httpcore").setLevel(logging.WARNING)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread (application shutdown)."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
@@ -3,16 +3,18 @@
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from fastapi.responses import RedirectResponse
+from fastapi.responses import ORJSONResponse, RedirectResponse
 from fastapi.middleware.cors import CORSMiddleware
 from slowapi import Limiter, _rate_limit_exceeded_handler
 from slowapi.util import get_remote_address
 from slowapi.errors import RateLimitExceeded
 from slowapi.middleware import SlowAPIMiddleware
 
+from app.cache import close_async_client
+from app.pubsub import close_async_redis
 from app.database import engine, Base
 from app.config import settings, get_cors_origins_list
-from app.logging_config import setup_logging
+from app.logging_config import setup_logging, stop_logging
 from api.tickets import router as tickets_router
 from api.websocket import router as websocket_router
 
@@ -36,7 +38,8 @@ async def lifespan(app: FastAPI):
     - Create database tables if they don't exist
     
     Shutdown:
-    - Cleanup (if needed)
+    - Stop WebSocket manager and close shared Redis clients
+    - Flush and stop the background logging listener
     """
     # Startup
     logger.info("🚀 Starting Triage & Recovery Hub API...")
@@ -54,6 +57,9 @@ async def lifespan(app: FastAPI):
     from api.websocket import manager
     if hasattr(manager, "shutdown"):
         await manager.shutdown()
+    await close_async_client()
+    await close_async_redis()
+    stop_logging()
 
 
 # Create FastAPI application
@@ -62,6 +68,7 @@ app = FastAPI(
     description="AI-powered customer support ticket triage system using Google Gemini",
     version="1.0.0",
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,  # orjson encodes response bodies in C
     docs_url="/docs",
     redoc_url="/redoc",
 )
@@ -118,39 +125,33 @@ async def deep_health_check():
         200 OK with component status if all healthy
         503 Service Unavailable if any dependency fails
     """
+    import asyncio
     from sqlalchemy import text
     from sqlalchemy.exc import SQLAlchemyError
-    from app.database import SessionLocal
-    import redis
+    from app.cache import get_async_client
+    from app.database import AsyncSessionLocal
     from redis.exceptions import RedisError
     
     status = {"db": "unknown", "redis": "unknown"}
     all_healthy = True
     
-    # Check PostgreSQL with context manager
+    # Check PostgreSQL on the async pool (no event-loop blocking)
     try:
-        with SessionLocal() as db:
-            db.execute(text("SELECT 1"))
+        async with AsyncSessionLocal() as db:
+            await db.execute(text("SELECT 1"))
         status["db"] = "ok"
-    except SQLAlchemyError as e:
+    except (SQLAlchemyError, OSError, asyncio.TimeoutError) as e:
+        # asyncpg surfaces unreachable hosts as OSError/timeouts, not SQLAlchemyError
         status["db"] = f"error: {str(e)[:100]}"
         all_healthy = False
     
-    # Check Redis with try/finally
-    r = None
+    # Check Redis with the shared pooled client (no connect per probe)
     try:
-        r = redis.from_url(settings.REDIS_URL)
-        r.ping()
+        await get_async_client().ping()
         status["redis"] = "ok"
     except RedisError as e:
         status["redis"] = f"error: {str(e)[:100]}"
         all_healthy = False
-    finally:
-        if r is not None:
-            try:
-                r.close()
-            except RedisError:
-                pass  # Ignore close errors
     
     if all_healthy:
         return {"status": "ok", "components": status}
@@ -4,132 +4,289 @@ This module enables cross-process communication between:
 - Huey Worker (publishes ticket updates after AI processing)
 - FastAPI Backend (subscribes and forwards to WebSocket clients)
 
-Channel: ticket:updated
+Channels: ticket:updated:{ticket_id} (one per ticket)
+Payload: MessagePack-encoded TicketUpdateMsg (both ends live in this repo;
+only the outward WebSocket frame is JSON)
+FastAPI subscribes only to tickets that have local WebSocket subscribers,
+so each process decodes just the updates it can deliver.
 """
 
-import json
+import asyncio
+import atexit
 import logging
+import msgspec
+import queue
+import threading
+import time
+from functools import lru_cache
 import redis
 import redis.asyncio as redis_async
-from typing import Callable, Any, Awaitable
+from typing import Callable, Any, Awaitable, Iterable, Optional
 
+from app.cache import ticket_cache_key
 from app.config import settings
 
 logger = logging.getLogger(__name__)
 
-# Channel name for ticket updates
-TICKET_UPDATE_CHANNEL = "ticket:updated"
+# Channel names for ticket updates (sharded per ticket)
+TICKET_UPDATE_CHANNEL_PREFIX = "ticket:updated:"
+TICKET_UPDATE_CHANNEL_PATTERN = f"{TICKET_UPDATE_CHANNEL_PREFIX}*"
 
 
+class TicketUpdateMsg(msgspec.Struct):
+    """Wire format of a ticket update event on the pub/sub channels."""
+    event: str
+    ticket_id: int
+    data: dict
+
+
+# Stateless codecs, built once (publishers pass plain values: no enc_hook fallback)
+_MSG_ENCODER = msgspec.msgpack.Encoder()
+_MSG_DECODER = msgspec.msgpack.Decoder(TicketUpdateMsg)
+
+
+def decode_ticket_update(payload: bytes) -> dict:
+    """Decode a channel payload into the {event, ticket_id, data} dict callbacks expect."""
+    return msgspec.structs.asdict(_MSG_DECODER.decode(payload))
+
+
+def ticket_update_channel(ticket_id: int) -> str:
+    """Pub/Sub channel carrying updates for a single ticket."""
+    return f"{TICKET_UPDATE_CHANNEL_PREFIX}{ticket_id}"
+
+
+@lru_cache(maxsize=1)
 def get_redis_client() -> redis.Redis:
-    """Get synchronous Redis client for publishing."""
-    return redis.from_url(settings.REDIS_URL, decode_responses=True)
+    """
+    Get shared synchronous Redis client for publishing.
+    
+    Created once per process; its connection pool keeps TCP connections warm
+    across publishes, so callers must not close it.
+    """
+    return redis.from_url(settings.REDIS_URL)  # Binary payloads: no decode_responses
+
+
+@lru_cache(maxsize=1)
+def get_async_redis() -> redis_async.Redis:
+    """
+    Get shared async Redis client for subscribing.
+    
+    Created on first use and reused across subscriber restarts, so a restart
+    does not pay a new connection pool; callers close only their PubSub.
+    Raw bytes payloads (MessagePack), so no decode_responses.
+    """
+    return redis_async.from_url(settings.REDIS_URL)
+
+
+async def close_async_redis() -> None:
+    """Close the shared async subscriber client if it was created (app shutdown)."""
+    if get_async_redis.cache_info().currsize:
+        await get_async_redis().aclose()
+        get_async_redis.cache_clear()
+
+
+# Publishes are queued and flushed by a background thread in pipelined batches
+PUBLISH_BATCH_SIZE = 100
+PUBLISH_FLUSH_INTERVAL_SECONDS = 0.02
+
+_publish_queue: "queue.Queue[tuple[int, bytes]]" = queue.Queue()
+_publisher_thread: Optional[threading.Thread] = None
+_publisher_lock = threading.Lock()
 
 
 def publish_ticket_update(ticket_id: int, ticket_data: dict) -> bool:
     """
-    Publish ticket update event to Redis.
+    Queue a ticket update event for publishing to Redis.
     
     Called by Huey Worker after AI processing completes.
+    Also invalidates the cached GET response for the ticket.
+    Events are sent in order by the publisher thread, batched per
+    PUBLISH_FLUSH_INTERVAL_SECONDS / PUBLISH_BATCH_SIZE.
     
     Args:
         ticket_id: The ticket ID that was updated
-        ticket_data: Dictionary containing ticket fields
+        ticket_data: Dictionary containing ticket fields (str enums are
+            encoded by value; datetimes should be passed as .isoformat())
         
     Returns:
-        True if published successfully, False otherwise
+        True if queued successfully, False otherwise
     """
-    client = None
     try:
-        client = get_redis_client()
-        
-        message = json.dumps({
-            "event": "ticket_updated",
-            "ticket_id": ticket_id,
-            "data": ticket_data
-        }, default=str)  # default=str handles datetime serialization
-        
-        # Publish to channel
-        subscribers = client.publish(TICKET_UPDATE_CHANNEL, message)
-        
-        logger.info(f"📡 Published ticket update: ticket_id={ticket_id}, subscribers={subscribers}")
-        return True
-        
-    except Exception as e:
+        message = _MSG_ENCODER.encode(TicketUpdateMsg(
+            event="ticket_updated",
+            ticket_id=ticket_id,
+            data=ticket_data,
+        ))
+    except (msgspec.EncodeError, TypeError) as e:
         logger.error(f"❌ Failed to publish ticket update: {e}")
         return False
-    finally:
-        if client:
-            client.close()
+    
+    _publish_queue.put((ticket_id, message))
+    _ensure_publisher_thread()
+    return True
+
+
+def flush_pending_publishes() -> None:
+    """Block until every queued publish has been sent (or failed)."""
+    if _publisher_thread is not None:
+        _publish_queue.join()
+
+
+def _ensure_publisher_thread() -> None:
+    global _publisher_thread
+    if _publisher_thread is not None:
+        return
+    with _publisher_lock:
+        if _publisher_thread is None:
+            thread = threading.Thread(target=_publisher_loop, name="redis-publisher", daemon=True)
+            thread.start()
+            _publisher_thread = thread
+            atexit.register(flush_pending_publishes)
+
+
+def _publisher_loop() -> None:
+    while True:
+        batch = [_publish_queue.get()]
+        # Fast path: a lone event goes out at once; only a burst (more already
+        # queued) waits out the flush window to fill the pipeline
+        burst = not _publish_queue.empty()
+        deadline = time.monotonic() + PUBLISH_FLUSH_INTERVAL_SECONDS
+        while burst and len(batch) < PUBLISH_BATCH_SIZE:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(_publish_queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        try:
+            _send_publish_batch(batch)
+        finally:
+            for _ in batch:
+                _publish_queue.task_done()
+
+
+def _send_publish_batch(batch: list[tuple[int, bytes]]) -> None:
+    """Drop cached GET responses and publish the batch in one round-trip."""
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        for ticket_id, message in batch:
+            pipe.delete(ticket_cache_key(ticket_id))
+            pipe.publish(ticket_update_channel(ticket_id), message)
+        pipe.execute()
+        logger.debug("📡 Published %d ticket update(s)", len(batch))
+    except Exception as e:
+        logger.error(f"❌ Failed to publish {len(batch)} ticket update(s): {e}")
 
 
 def get_pubsub() -> tuple[redis.Redis, redis.client.PubSub]:
     """
     Get Redis PubSub instance for subscribing.
     
-    Used by FastAPI to listen for ticket updates.
+    Subscribes to every ticket channel via pattern (ops/debug tooling).
     
     Returns:
-        Tuple of (Redis client, PubSub instance)
+        Tuple of (shared Redis client, PubSub instance); close only the PubSub
     """
     client = get_redis_client()
     pubsub = client.pubsub()
-    pubsub.subscribe(TICKET_UPDATE_CHANNEL)
+    pubsub.psubscribe(TICKET_UPDATE_CHANNEL_PATTERN)
     return client, pubsub
 
 
-def subscribe_ticket_updates(callback: Callable[[dict], Any]) -> None:
+def subscribe_ticket_updates(
+    callback: Callable[[dict], Any],
+    stop: Optional[threading.Event] = None,
+) -> None:
     """
     Subscribe to ticket updates and call callback for each message.
     
     This is a blocking function - should be run in a background thread.
+    Polls with a 1s timeout so setting `stop` ends the loop cooperatively.
     
     Args:
         callback: Function to call with each ticket update message
+        stop: Optional event that stops the subscription when set
     """
     client, pubsub = get_pubsub()
+    stop = stop or threading.Event()
     
-    logger.info(f"🔔 Subscribed to channel: {TICKET_UPDATE_CHANNEL}")
+    logger.info(f"🔔 Subscribed to channels: {TICKET_UPDATE_CHANNEL_PATTERN}")
     
     try:
-        for message in pubsub.listen():
-            if message["type"] == "message":
-                try:
-                    data = json.loads(message["data"])
-                    callback(data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Invalid JSON in pubsub message: {e}")
+        while not stop.is_set():
+            message = pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+            if message is None:
+                continue
+            try:
+                data = decode_ticket_update(message["data"])
+                callback(data)
+            except msgspec.DecodeError as e:
+                logger.error(f"❌ Invalid pubsub message: {e}")
     except Exception as e:
         logger.error(f"❌ PubSub subscription error: {e}")
     finally:
         pubsub.close()
-        client.close()
 
 
-async def subscribe_ticket_updates_async(callback: Callable[[dict], Awaitable[Any]]) -> None:
+class TicketUpdateSubscriber:
     """
-    Async subscribe to ticket updates (non-blocking).
+    Async subscriber holding one Redis PubSub connection per process.
     
-    Args:
-        callback: Async function to call with each ticket update message
+    Channels are added/removed as local WebSocket subscriptions come and go,
+    so Redis only forwards updates for tickets this process is watching.
     """
-    client = redis_async.from_url(settings.REDIS_URL, decode_responses=True)
-    pubsub = client.pubsub()
     
-    try:
-        await pubsub.subscribe(TICKET_UPDATE_CHANNEL)
-        logger.info(f"🔔 Async Subscribed to channel: {TICKET_UPDATE_CHANNEL}")
-        
-        async for message in pubsub.listen():
-            if message["type"] == "message":
+    def __init__(self, callback: Callable[[dict], Awaitable[Any]]):
+        """
+        Args:
+            callback: Async function to call with each ticket update message
+        """
+        self._callback = callback
+        self._pubsub: Optional[redis_async.client.PubSub] = None
+        # PubSub cannot be read before its first SUBSCRIBE
+        self._has_subscribed = asyncio.Event()
+    
+    def _get_pubsub(self) -> redis_async.client.PubSub:
+        if self._pubsub is None:
+            self._pubsub = get_async_redis().pubsub()
+        return self._pubsub
+    
+    async def subscribe(self, ticket_ids: Iterable[int]) -> None:
+        """Start receiving updates for these tickets."""
+        channels = [ticket_update_channel(tid) for tid in ticket_ids]
+        if channels:
+            await self._get_pubsub().subscribe(*channels)
+            self._has_subscribed.set()
+    
+    async def unsubscribe(self, ticket_ids: Iterable[int]) -> None:
+        """Stop receiving updates for these tickets."""
+        channels = [ticket_update_channel(tid) for tid in ticket_ids]
+        if channels and self._pubsub is not None:
+            await self._pubsub.unsubscribe(*channels)
+    
+    async def run(self) -> None:
+        """Listen for ticket updates until cancelled."""
+        try:
+            await self._has_subscribed.wait()
+            logger.info(f"🔔 Async subscriber listening on {TICKET_UPDATE_CHANNEL_PREFIX}{{ticket_id}}")
+            
+            while True:
+                message = await self._pubsub.get_message(ignore_subscribe_messages=True, timeout=1.0)
+                if message is None:
+                    continue
                 try:
-                    data = json.loads(message["data"])
-                    await callback(data)
-                except json.JSONDecodeError as e:
-                    logger.error(f"❌ Invalid JSON in pubsub message: {e}")
+                    data = decode_ticket_update(message["data"])
+                    await self._callback(data)
+                except msgspec.DecodeError as e:
+                    logger.error(f"❌ Invalid pubsub message: {e}")
                     
-    except Exception as e:
-        logger.error(f"❌ Async PubSub error: {e}")
-    finally:
-        await pubsub.close()
-        await client.close()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"❌ Async PubSub error: {e}")
+        finally:
+            if self._pubsub is not None:
+                await self._pubsub.aclose()
+                # Never hand out the closed PubSub again
+                self._pubsub = None
@@ -0,0 +1,53 @@
+"""Composite indexes for list_tickets filters and keyset pagination.
+
+Revision ID: 002_list_tickets_indexes
+Revises: 001_initial_schema
+Create Date: 2026-10-14
+
+Each filter column is paired with created_at DESC so filtered listings can
+read rows in index order and stop after LIMIT. (created_at DESC, id DESC)
+backs the keyset cursor. Built CONCURRENTLY to avoid locking writes.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '002_list_tickets_indexes'
+down_revision = '001_initial_schema'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns)
+INDEXES = [
+    ('ix_tickets_status_created', ['status', sa.text('created_at DESC')]),
+    ('ix_tickets_urgency_created', ['urgency', sa.text('created_at DESC')]),
+    ('ix_tickets_category_created', ['category', sa.text('created_at DESC')]),
+    ('ix_tickets_ai_status_created', ['ai_status', sa.text('created_at DESC')]),
+    ('ix_tickets_created_id', [sa.text('created_at DESC'), sa.text('id DESC')]),
+]
+
+
+def upgrade():
+    """Create composite indexes without blocking writes."""
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction block
+    with op.get_context().autocommit_block():
+        for name, columns in INDEXES:
+            op.create_index(
+                name, 'tickets', columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    """Drop composite indexes."""
+    with op.get_context().autocommit_block():
+        for name, _ in reversed(INDEXES):
+            op.drop_index(
+                name, 'tickets',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,38 @@
+"""Drop the redundant unique index on tickets.id.
+
+Revision ID: 003_drop_redundant_id_index
+Revises: 002_list_tickets_indexes
+Create Date: 2026-10-14
+
+The primary key already provides a unique btree on id (tickets_pkey), so
+ix_tickets_id only adds maintenance cost to every INSERT.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '003_drop_redundant_id_index'
+down_revision = '002_list_tickets_indexes'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    """Drop ix_tickets_id without blocking writes."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_tickets_id', 'tickets',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+
+
+def downgrade():
+    """Recreate ix_tickets_id."""
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_tickets_id', 'tickets', ['id'],
+            unique=True,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
@@ -0,0 +1,49 @@
+"""Drop single-column indexes covered by the 002 composites.
+
+Revision ID: 004_drop_covered_indexes
+Revises: 003_drop_redundant_id_index
+Create Date: 2026-10-14
+
+status, urgency and created_at are each the leading column of a composite
+index from 002, which serves the same lookups. The single-column copies
+only add write cost on every INSERT and worker UPDATE.
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '004_drop_covered_indexes'
+down_revision = '003_drop_redundant_id_index'
+branch_labels = None
+depends_on = None
+
+
+# (index name, columns)  # covering composite
+INDEXES = [
+    ('ix_tickets_status', ['status']),          # ix_tickets_status_created
+    ('ix_tickets_urgency', ['urgency']),        # ix_tickets_urgency_created
+    ('ix_tickets_created_at', ['created_at']),  # ix_tickets_created_id
+]
+
+
+def upgrade():
+    """Drop covered indexes without blocking writes."""
+    with op.get_context().autocommit_block():
+        for name, _ in INDEXES:
+            op.drop_index(
+                name, 'tickets',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade():
+    """Recreate single-column indexes."""
+    with op.get_context().autocommit_block():
+        for name, columns in reversed(INDEXES):
+            op.create_index(
+                name, 'tickets', columns,
+                unique=False,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
@@ -1,9 +1,11 @@
 """Pydantic schemas for request/response validation."""
 
-from pydantic import BaseModel, Field, field_validator
-from typing import Optional
+import msgspec
+from pydantic import BaseModel, Field, TypeAdapter, field_validator
+from typing import Annotated, List, Literal, Optional, Union
 from datetime import datetime
 
+from app.config import settings
 # Import centralized enums (single source of truth)
 from models.enums import TicketStatus, TicketCategory, UrgencyLevel, AIStatus
 
@@ -49,6 +51,18 @@ class AITriageResponse(BaseModel):
     }
 
 
+class AITriageStruct(msgspec.Struct):
+    """
+    msgspec mirror of AITriageResponse for the worker hot path.
+    Same constraints, validated without a Pydantic pass.
+    """
+    category: TicketCategory
+    sentiment_score: Annotated[int, msgspec.Meta(ge=1, le=10)]
+    urgency: UrgencyLevel
+    draft_response: Annotated[str, msgspec.Meta(min_length=20, max_length=2000)]
+    ai_status: AIStatus = AIStatus.SUCCESS
+
+
 # Response Schemas
 
 class TicketResponse(BaseModel):
@@ -73,16 +87,51 @@ class TicketResponse(BaseModel):
     }
 
 
+# Built once: validates/serializes a list of ORM rows in a single core call
+TICKET_LIST_ADAPTER = TypeAdapter(List[TicketResponse])
+
+
 class PaginationMeta(BaseModel):
-    """Standard pagination metadata following offset pagination pattern."""
-    total: int
+    """Keyset pagination metadata (total/total_pages only when include_total=true)."""
     page: int
     per_page: int
-    total_pages: int
     has_more: bool
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
+    total_pages: Optional[int] = None
 
 
 class TicketListResponse(BaseModel):
     """API response for ticket list with pagination."""
     data: list[TicketResponse]
     pagination: PaginationMeta
+
+
+class TicketStatsResponse(BaseModel):
+    """Ticket counts per processing status."""
+    pending: int = 0
+    processing: int = 0
+    completed: int = 0
+    failed: int = 0
+
+
+# WebSocket Client Messages
+
+class WSTicketsMessage(BaseModel):
+    """Client subscribe/unsubscribe message for /ws/tickets."""
+    action: Literal["subscribe", "unsubscribe"]
+    ticket_ids: List[int] = Field(
+        default_factory=list,
+        max_length=settings.WS_MAX_TICKET_IDS_PER_MESSAGE,  # Bound work per message
+    )
+
+
+class WSPingMessage(BaseModel):
+    """Client keepalive message for /ws/tickets."""
+    action: Literal["ping"]
+
+
+# Dispatch on "action" in pydantic-core; parses raw JSON frames in one call
+WS_CLIENT_MESSAGE_ADAPTER = TypeAdapter(
+    Annotated[Union[WSTicketsMessage, WSPingMessage], Field(discriminator="action")]
+)
@@ -1,6 +1,6 @@
 """SQLAlchemy ORM models for ticket management."""
 
-from sqlalchemy import Column, Integer, String, Text, Enum, DateTime, CheckConstraint
+from sqlalchemy import Column, Integer, String, Text, Enum, DateTime, CheckConstraint, Index
 from sqlalchemy.sql import func
 
 from app.database import Base
@@ -26,16 +26,16 @@ class Ticket(Base):
     )
     
     # Primary key
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True)  # PK index only; no separate ix_tickets_id
     
     # Customer input
     customer_complaint = Column(Text, nullable=False)
-    status = Column(Enum(TicketStatus), default=TicketStatus.PENDING, index=True)
+    status = Column(Enum(TicketStatus), default=TicketStatus.PENDING)
     
     # AI Processing Results
     category = Column(Enum(TicketCategory), nullable=True)
     sentiment_score = Column(Integer, nullable=True)  # 1-10 scale (validated by constraint)
-    urgency = Column(Enum(UrgencyLevel), nullable=True, index=True)
+    urgency = Column(Enum(UrgencyLevel), nullable=True)
     ai_draft_response = Column(Text, nullable=True)
     ai_status = Column(Enum(AIStatus), nullable=True)  # success, fallback, error
     
@@ -45,7 +45,7 @@ class Ticket(Base):
     agent_id = Column(String(255), nullable=True, index=True)  # Added index for filtering
     
     # Metadata
-    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)  # Added index for ORDER BY
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(
         DateTime(timezone=True), 
         server_default=func.now(), 
@@ -55,3 +55,14 @@ class Ticket(Base):
     
     def __repr__(self):
         return f"<Ticket(id={self.id}, status={self.status}, urgency={self.urgency})>"
+
+
+# Composite indexes matching list_tickets filters + ORDER BY created_at DESC, id DESC
+# (index-order scan lets LIMIT stop after per_page rows instead of sorting).
+# They also cover lookups on their leading column, so those columns carry no
+# separate single-column index.
+Index("ix_tickets_status_created", Ticket.status, Ticket.created_at.desc())
+Index("ix_tickets_urgency_created", Ticket.urgency, Ticket.created_at.desc())
+Index("ix_tickets_category_created", Ticket.category, Ticket.created_at.desc())
+Index("ix_tickets_ai_status_created", Ticket.ai_status, Ticket.created_at.desc())
+Index("ix_tickets_created_id", Ticket.created_at.desc(), Ticket.id.desc())
@@ -1,6 +1,5 @@
 import requests
-import time
-import json
+from concurrent.futures import ThreadPoolExecutor
 
 BASE_URL = "http://localhost:8000/api/tickets"
 
@@ -15,17 +14,24 @@ test_cases = [
 
 print(f"🚀 Sending 5 FRESH test requests to {BASE_URL}...\n")
 
-for i, complaint in enumerate(test_cases, 1):
-    payload = {"customer_complaint": complaint}
-    try:
-        response = requests.post(BASE_URL, json=payload, timeout=10)
-        response.raise_for_status()
-        data = response.json()
-        print(f"✅ [{i}/{len(test_cases)}] Created Ticket #{data['id']}")
-        print(f"   Complaint: {complaint[:50]}...")
-        print(f"   Status: {data['status']}")
-    except Exception as e:
-        print(f"❌ [{i}/{len(test_cases)}] Failed: {e}")
-    time.sleep(1)
+def send_ticket(session, complaint):
+    """POST one complaint on the shared keep-alive session."""
+    response = session.post(BASE_URL, json={"customer_complaint": complaint}, timeout=10)
+    response.raise_for_status()
+    return response.json()
+
+
+# One keep-alive session, all requests in flight at once
+with requests.Session() as session, ThreadPoolExecutor(max_workers=len(test_cases)) as executor:
+    futures = [executor.submit(send_ticket, session, complaint) for complaint in test_cases]
+    
+    for i, (complaint, future) in enumerate(zip(test_cases, futures), 1):
+        try:
+            data = future.result()
+            print(f"✅ [{i}/{len(test_cases)}] Created Ticket #{data['id']}")
+            print(f"   Complaint: {complaint[:50]}...")
+            print(f"   Status: {data['status']}")
+        except Exception as e:
+            print(f"❌ [{i}/{len(test_cases)}] Failed: {e}")
 
 print("\n✨ Data seeded into fresh database! Monitoring worker...")
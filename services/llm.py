@@ -1,15 +1,48 @@
 """Google Gemini API integration for ticket triage."""
 
+import hashlib
 import logging
-from typing import Optional
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
 import google.generativeai as genai
+from pydantic import ValidationError
 
+from app.cache import cache_triage, get_cached_triage, invalidate_triage
 from app.config import settings
+from models.enums import AIStatus
 from models.schemas import AITriageResponse
 from services.validation import validation_service
 
 logger = logging.getLogger(__name__)
 
+# Constant prompt around the complaint, built once (see TriageService._build_prompt)
+_PROMPT_PREFIX = """You are a customer support triage assistant. Analyze this customer complaint and respond with ONLY valid JSON.
+
+Customer Complaint:
+"""
+
+_PROMPT_SUFFIX = """
+
+Respond with exactly this JSON structure:
+{
+  "category": "Billing" or "Technical" or "Feature Request",
+  "sentiment_score": number between 1 and 10 (1=very angry, 10=very satisfied),
+  "urgency": "High" or "Medium" or "Low",
+  "draft_response": "polite, professional response addressing their concern"
+}
+
+IMPORTANT RULES:
+1. Return ONLY the JSON object (no markdown, no code blocks)
+2. No explanations or extra text before/after JSON
+3. Ensure all field values are valid and within specified ranges
+4. draft_response must be 20-2000 characters
+5. Use double quotes for JSON strings
+6. Categories are case-sensitive: "Billing", "Technical", "Feature Request"
+7. Urgency levels are case-sensitive: "High", "Medium", "Low"
+"""
+
 
 class TriageService:
     """
@@ -21,12 +54,30 @@ class TriageService:
     - JSON output with validation
     - Automatic fallback on errors
     - Comprehensive logging
+    - Repeated complaints reuse earlier results (in-process LRU + Redis)
+    
+    The cache key is the normalized complaint text alone, so identical
+    complaints from different customers share one result, including its
+    draft_response. The draft is generated from that text only (no
+    customer fields are in the prompt), so a fresh call would produce an
+    equivalent reply.
     """
     
+    # In-process entries kept per worker (Redis holds the shared copy)
+    CACHE_MAX_ENTRIES = 1024
+    
     def __init__(self):
         """Initialize Gemini API client."""
         genai.configure(api_key=settings.GOOGLE_API_KEY)
-        self.model = genai.GenerativeModel(settings.GOOGLE_MODEL)
+        # One model shared by all worker threads (it keeps no per-request state).
+        # JSON mime type makes Gemini return a bare object, no markdown fences.
+        self.model = genai.GenerativeModel(
+            settings.GOOGLE_MODEL,
+            generation_config={"response_mime_type": "application/json", "temperature": 0.2},
+        )
+        # complaint hash -> (expires_at, response)
+        self._cache: "OrderedDict[str, Tuple[float, AITriageResponse]]" = OrderedDict()
+        self._cache_lock = threading.Lock()
     
     def triage_complaint(self, complaint: str, timeout: int = 30) -> Optional[AITriageResponse]:
         """
@@ -40,6 +91,12 @@ class TriageService:
             AITriageResponse with category, sentiment, urgency, draft_response
             or fallback response if AI fails
         """
+        complaint_hash = self._complaint_hash(complaint)
+        cached = self._get_cached(complaint_hash)
+        if cached is not None:
+            logger.info(f"[TRIAGE] Cache hit for complaint (length={len(complaint)} chars)")
+            return cached
+        
         prompt = self._build_prompt(complaint)
         
         try:
@@ -51,7 +108,7 @@ class TriageService:
             # Note: request_options with timeout is not supported in google-generativeai v0.3.0
             # Timeout will be handled at the network layer or by upgrading the SDK
             response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = response.text
             # DEBUG: Raw response may contain reflected PII - only log in development
             if settings.DEBUG:
                 logger.debug(f"[TRIAGE] Raw response preview: {response_text[:200]}")
@@ -72,12 +129,65 @@ class TriageService:
                 f"[TRIAGE] ✅ Success: {validated.category.value}, "
                 f"Urgency={validated.urgency.value}, Sentiment={validated.sentiment_score}"
             )
+            self._store_cached(complaint_hash, validated)
             return validated
             
         except Exception as e:
             logger.error(f"[TRIAGE] ❌ Gemini error: {str(e)}")
             return validation_service.get_fallback_response()
     
+    @staticmethod
+    def _complaint_hash(complaint: str) -> str:
+        """Hash of the normalized complaint text (whitespace/case-insensitive)."""
+        normalized = " ".join(complaint.split()).lower()
+        return hashlib.blake2b(normalized.encode(), digest_size=16).hexdigest()
+    
+    def _get_cached(self, complaint_hash: str) -> Optional[AITriageResponse]:
+        """Look up a previous successful triage: local LRU first, then Redis."""
+        if settings.TRIAGE_CACHE_TTL_SECONDS <= 0:
+            return None
+        now = time.monotonic()
+        with self._cache_lock:
+            entry = self._cache.get(complaint_hash)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at > now:
+                    self._cache.move_to_end(complaint_hash)
+                    return response
+                del self._cache[complaint_hash]
+        
+        payload = get_cached_triage(complaint_hash)
+        if payload is None:
+            return None
+        try:
+            response = AITriageResponse.model_validate_json(payload)
+        except ValidationError:
+            # Corrupt or written by an older schema: treat as a miss and drop it
+            logger.warning("[TRIAGE] Discarding invalid cached triage entry")
+            invalidate_triage(complaint_hash)
+            return None
+        self._remember(complaint_hash, response, now)
+        return response
+    
+    def _store_cached(self, complaint_hash: str, response: AITriageResponse) -> None:
+        """Cache a successful triage locally and in Redis (fallbacks are never cached)."""
+        if settings.TRIAGE_CACHE_TTL_SECONDS <= 0 or response.ai_status != AIStatus.SUCCESS:
+            return
+        self._remember(complaint_hash, response, time.monotonic())
+        cache_triage(complaint_hash, response.model_dump_json())
+    
+    def _remember(self, complaint_hash: str, response: AITriageResponse, now: float) -> None:
+        with self._cache_lock:
+            self._cache[complaint_hash] = (now + settings.TRIAGE_CACHE_TTL_SECONDS, response)
+            self._cache.move_to_end(complaint_hash)
+            while len(self._cache) > self.CACHE_MAX_ENTRIES:
+                self._cache.popitem(last=False)
+    
+    def clear_cache(self) -> None:
+        """Drop in-process cached results (Redis entries expire on their own)."""
+        with self._cache_lock:
+            self._cache.clear()
+    
     @staticmethod
     def _build_prompt(complaint: str) -> str:
         """
@@ -94,28 +204,7 @@ class TriageService:
         Returns:
             Formatted prompt string
         """
-        return f"""You are a customer support triage assistant. Analyze this customer complaint and respond with ONLY valid JSON.
-
-Customer Complaint:
-{complaint}
-
-Respond with exactly this JSON structure:
-{{
-  "category": "Billing" or "Technical" or "Feature Request",
-  "sentiment_score": number between 1 and 10 (1=very angry, 10=very satisfied),
-  "urgency": "High" or "Medium" or "Low",
-  "draft_response": "polite, professional response addressing their concern"
-}}
-
-IMPORTANT RULES:
-1. Return ONLY the JSON object (no markdown, no code blocks)
-2. No explanations or extra text before/after JSON
-3. Ensure all field values are valid and within specified ranges
-4. draft_response must be 20-2000 characters
-5. Use double quotes for JSON strings
-6. Categories are case-sensitive: "Billing", "Technical", "Feature Request"
-7. Urgency levels are case-sensitive: "High", "Medium", "Low"
-"""
+        return _PROMPT_PREFIX + complaint + _PROMPT_SUFFIX
 
 
 triage_service = TriageService()
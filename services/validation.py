@@ -1,15 +1,17 @@
 """JSON validation and error handling for AI responses."""
 
-import json
 import logging
 from typing import Optional, Dict, Any
-from pydantic import ValidationError
+import msgspec
 
-from models.schemas import AITriageResponse
+from models.schemas import AITriageResponse, AITriageStruct
 from models.enums import AIStatus
 
 logger = logging.getLogger(__name__)
 
+# Reused untyped decoder (msgspec parses JSON several times faster than stdlib json)
+_JSON_DECODER = msgspec.json.Decoder()
+
 
 class ValidationService:
     """
@@ -28,7 +30,7 @@ class ValidationService:
         
         Handles edge cases:
         - Markdown code blocks (```json ... ```)
-        - Leading/trailing whitespace
+        - Leading/trailing whitespace or prose around the object
         - Partial JSON responses
         
         Args:
@@ -44,29 +46,34 @@ class ValidationService:
         
         try:
             # Try direct parse first
-            return json.loads(response_text)
-        except json.JSONDecodeError:
-            # Try cleaning markdown blocks
-            cleaned = response_text.strip()
-            
-            if cleaned.startswith('```json'):
-                cleaned = cleaned[7:]
-            elif cleaned.startswith('```'):
-                cleaned = cleaned[3:]
-            
-            if cleaned.endswith('```'):
-                cleaned = cleaned[:-3]
+            parsed = _JSON_DECODER.decode(response_text)
+        except msgspec.DecodeError:
+            # JSON mode normally returns a bare object; as a safety net slice the
+            # outermost {...}, dropping markdown fences or any prose around it
+            start = response_text.find('{')
+            end = response_text.rfind('}')
+            if start == -1 or end < start:
+                logger.error(f"Failed to parse JSON: {response_text[:100]}...")
+                return None
             
             try:
-                return json.loads(cleaned.strip())
-            except json.JSONDecodeError:
+                parsed = _JSON_DECODER.decode(response_text[start:end + 1])
+            except msgspec.DecodeError:
                 logger.error(f"Failed to parse JSON: {response_text[:100]}...")
                 return None
+        
+        if not isinstance(parsed, dict):
+            logger.error(f"Expected JSON object, got {type(parsed).__name__}")
+            return None
+        return parsed
     
     @staticmethod
     def validate_ai_response(response_data: Dict[str, Any]) -> Optional[AITriageResponse]:
         """
-        Validate AI response against Pydantic schema.
+        Validate AI response with the AITriageStruct constraints.
+        
+        msgspec checks types and ranges; the result is wrapped in the Pydantic
+        model without revalidating so callers keep the same return type.
         
         Args:
             response_data: Parsed JSON from Gemini
@@ -75,12 +82,13 @@ class ValidationService:
             Validated AITriageResponse or None if validation fails
         """
         try:
-            validated = AITriageResponse(**response_data)
-            return validated
-        except ValidationError as e:
+            # strict=False: accept numeric strings like Pydantic's lax mode
+            validated = msgspec.convert(response_data, AITriageStruct, strict=False)
+        except msgspec.ValidationError as e:
             logger.error(f"Schema validation failed: {e}")
             logger.debug(f"Invalid response data: {response_data}")
             return None
+        return AITriageResponse.model_construct(**msgspec.structs.asdict(validated))
     
     @staticmethod
     def get_fallback_response() -> AITriageResponse:
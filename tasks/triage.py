@@ -1,9 +1,14 @@
 """Background task for AI-powered ticket triage."""
 
 import logging
+import random
 import time
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 from sqlalchemy.exc import SQLAlchemyError
-from sqlalchemy import update
+from sqlalchemy import select, update
+from huey import crontab
+from huey.api import Task
 
 from tasks.worker import huey
 from app.database import SessionLocal
@@ -15,93 +20,130 @@ from services.llm import triage_service
 
 logger = logging.getLogger(__name__)
 
+# Failures logged without a traceback
+_EXPECTED_ERRORS = (ValueError, TimeoutError)
 
-@huey.task(retries=3, retry_delay=60)
-def process_ticket_triage(ticket_id: int):
+# Retry policy: exponential backoff with full jitter so a burst of failed
+# tickets doesn't retry in lockstep against the same upstream
+TRIAGE_RETRIES = 3
+RETRY_BASE_DELAY_SECONDS = 5
+RETRY_MAX_DELAY_SECONDS = 300
+
+
+def _retry_delay(retries_left: int) -> float:
+    """Full-jitter delay for the next attempt: uniform(0, min(cap, base * 2**attempt))."""
+    attempt = TRIAGE_RETRIES - retries_left
+    return random.uniform(0, min(RETRY_MAX_DELAY_SECONDS, RETRY_BASE_DELAY_SECONDS * 2 ** attempt))
+
+
+@huey.task(retries=TRIAGE_RETRIES, retry_delay=RETRY_BASE_DELAY_SECONDS, context=True)
+def process_ticket_triage(ticket_id: int, task: Optional[Task] = None):
     """
     Background task: Process ticket with Gemini AI triage.
     
     Features:
-    - Retries 3 times with 5 second delay on failure
-    - Database transaction handling with rollback
+    - Retries 3 times with jittered exponential backoff (5s base, 300s cap)
+    - Short transactions via Session.begin() (commit/rollback on exit)
     - Comprehensive error logging
     - Status updates: pending → processing → completed/failed
+      (a failed attempt with retries left goes back to pending, so the
+      retry's atomic claim picks it up; failed is written on the last attempt)
     - Fallback responses via triage_service
     - API timeout protection
     
     Args:
         ticket_id: ID of ticket to process
+        task: Huey task instance (context=True); its retry count travels with
+            the queued message, so backoff survives worker restarts
     """
     with SessionLocal() as db:
         try:
             logger.info(f"[WORKER] Starting triage for ticket {ticket_id}")
             start_time = time.time()
             
-            # Get ticket
-            ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-            if not ticket:
-                logger.error(f"[WORKER] Ticket {ticket_id} not found!")
-                return
-            
             # Atomic claim: Only process if status is PENDING (prevents race condition)
-            # This UPDATE only affects rows WHERE status=PENDING, returning rowcount
-            result = db.execute(
-                update(Ticket)
-                .where(Ticket.id == ticket_id, Ticket.status == TicketStatus.PENDING)
-                .values(status=TicketStatus.PROCESSING)
-            )
-            db.commit()
-            
-            if result.rowcount == 0:
-                logger.warning(
-                    f"[WORKER] Skipping ticket {ticket_id}: already claimed or not pending. "
-                    "This may happen if another worker processed it or an agent manually resolved."
+            # One UPDATE ... RETURNING both claims the row and loads what we need;
+            # each begin() block commits on exit (rolls back on error)
+            with db.begin():
+                claimed = db.execute(
+                    update(Ticket)
+                    .where(Ticket.id == ticket_id, Ticket.status == TicketStatus.PENDING)
+                    .values(status=TicketStatus.PROCESSING)
+                    .returning(Ticket.customer_complaint, Ticket.updated_at)
+                ).one_or_none()
+                
+                # Rare path: one extra SELECT only to log the right reason
+                exists = claimed is not None or (
+                    db.scalar(select(Ticket.id).where(Ticket.id == ticket_id)) is not None
                 )
-                return
             
-            # Refresh ticket to sync ORM state with DB after atomic update
-            db.refresh(ticket)
+            if claimed is None:
+                if not exists:
+                    logger.error(f"[WORKER] Ticket {ticket_id} not found!")
+                else:
+                    logger.warning(
+                        f"[WORKER] Skipping ticket {ticket_id}: already claimed or not pending. "
+                        "This may happen if another worker processed it or an agent manually resolved."
+                    )
+                return
             
             logger.info(f"[WORKER] Ticket {ticket_id} claimed and marked as processing")
             
             # Broadcast "Processing" state to Frontend
             publish_ticket_update(ticket_id, {
-                "id": ticket.id,
-                "status": TicketStatus.PROCESSING.value,
-                "updated_at": str(ticket.updated_at)
+                "id": ticket_id,
+                "status": TicketStatus.PROCESSING,
+                "updated_at": claimed.updated_at.isoformat()
             })
             
-            # Call Gemini API (triage_service has internal timeout handling)
+            # Call Gemini API outside any transaction (no connection held meanwhile)
             logger.info(f"[WORKER] Calling Gemini for ticket {ticket_id}...")
             ai_response = triage_service.triage_complaint(
-                ticket.customer_complaint,
+                claimed.customer_complaint,
                 timeout=settings.API_TIMEOUT_SECONDS
             )
             
             if not ai_response:
                 raise ValueError("Gemini service returned None")
             
-            # Update ticket with AI results
-            ticket.category = ai_response.category
-            ticket.sentiment_score = ai_response.sentiment_score
-            ticket.urgency = ai_response.urgency
-            ticket.ai_draft_response = ai_response.draft_response
-            ticket.ai_status = ai_response.ai_status  # Track if success or fallback
-            ticket.status = TicketStatus.COMPLETED
-            ticket.error_message = None
-            
-            db.commit()
+            # Update ticket with AI results (Core UPDATE, no ORM unit-of-work).
+            # Only while our claim stands: the Gemini call has no enforced timeout,
+            # so a slow run may have been rescued and re-claimed, or the ticket
+            # resolved by an agent, in the meantime
+            with db.begin():
+                updated_at = db.execute(
+                    update(Ticket)
+                    .where(Ticket.id == ticket_id, Ticket.status == TicketStatus.PROCESSING)
+                    .values(
+                        category=ai_response.category,
+                        sentiment_score=ai_response.sentiment_score,
+                        urgency=ai_response.urgency,
+                        ai_draft_response=ai_response.draft_response,
+                        ai_status=ai_response.ai_status,  # Track if success or fallback
+                        status=TicketStatus.COMPLETED,
+                        error_message=None,
+                    )
+                    .returning(Ticket.updated_at)
+                ).scalar_one_or_none()
+            
+            if updated_at is None:
+                logger.warning(
+                    f"[WORKER] Discarding triage result for ticket {ticket_id}: "
+                    "no longer processing (rescued, re-claimed or resolved meanwhile)"
+                )
+                return
             
             # Publish update to Redis for WebSocket broadcast
+            # (enum members go in as-is: msgspec encodes str enums by value natively)
             publish_ticket_update(ticket_id, {
-                "id": ticket.id,
-                "status": ticket.status.value,
-                "category": ticket.category.value if ticket.category else None,
-                "urgency": ticket.urgency.value if ticket.urgency else None,
-                "sentiment_score": ticket.sentiment_score,
-                "ai_status": ticket.ai_status.value if ticket.ai_status else None,
-                "ai_draft_response": ticket.ai_draft_response,
-                "updated_at": str(ticket.updated_at)
+                "id": ticket_id,
+                "status": TicketStatus.COMPLETED,
+                "category": ai_response.category,
+                "urgency": ai_response.urgency,
+                "sentiment_score": ai_response.sentiment_score,
+                "ai_status": ai_response.ai_status,
+                "ai_draft_response": ai_response.draft_response,
+                "updated_at": updated_at.isoformat()
             })
             
             elapsed = time.time() - start_time
@@ -112,30 +154,91 @@ def process_ticket_triage(ticket_id: int):
             )
             
         except Exception as e:
-            logger.error(f"[WORKER] ❌ Error for ticket {ticket_id}: {str(e)}", exc_info=True)
-            
-            # Rollback any pending transaction before attempting status update
-            db.rollback()
+            error_message = str(e)[:500]  # Truncate long errors (stored and published)
+            will_retry = task is not None and task.retries > 0
+            if will_retry:
+                # Huey requeues using task.retry_delay once we re-raise; the
+                # ticket goes back to PENDING below so that attempt claims it
+                task.retry_delay = _retry_delay(task.retries)
+                # Another attempt follows: one line, no traceback formatting
+                logger.warning(
+                    f"[WORKER] Retryable error for ticket {ticket_id} "
+                    f"(retrying in {task.retry_delay:.1f}s, {task.retries} retries left): "
+                    f"{type(e).__name__}: {error_message[:200]}"
+                )
+            else:
+                # Final attempt: tracebacks only for unexpected errors
+                logger.error(
+                    f"[WORKER] ❌ Error for ticket {ticket_id}: {error_message}",
+                    exc_info=not isinstance(e, _EXPECTED_ERRORS),
+                )
             
-            # Update ticket with error status
+            # Record the error (the failed begin() block already rolled back).
+            # With retries left the ticket returns to PENDING, otherwise the
+            # retried run's claim would skip it; FAILED only on the last attempt.
+            next_status = TicketStatus.PENDING if will_retry else TicketStatus.FAILED
             try:
-                ticket = db.query(Ticket).filter(Ticket.id == ticket_id).first()
-                if ticket:
-                    ticket.status = TicketStatus.FAILED
-                    ticket.error_message = str(e)[:500]  # Truncate long errors
-                    db.commit()
-                    
-                    # Publish failure to Redis for WebSocket broadcast
+                stmt = update(Ticket).where(Ticket.id == ticket_id)
+                if will_retry:
+                    # Only release our own claim, never reopen a ticket changed meanwhile
+                    stmt = stmt.where(Ticket.status == TicketStatus.PROCESSING)
+                with db.begin():
+                    updated_at = db.execute(
+                        stmt
+                        .values(status=next_status, error_message=error_message)
+                        .returning(Ticket.updated_at)
+                    ).scalar_one_or_none()
+                
+                if updated_at is not None:
+                    # Publish the new status to Redis for WebSocket broadcast
                     publish_ticket_update(ticket_id, {
-                        "id": ticket.id,
-                        "status": ticket.status.value,
-                        "error_message": ticket.error_message,
-                        "updated_at": str(ticket.updated_at)
+                        "id": ticket_id,
+                        "status": next_status,
+                        "error_message": error_message,
+                        "updated_at": updated_at.isoformat()
                     })
                     
-                    logger.info(f"[WORKER] Updated ticket {ticket_id} status to failed")
+                    logger.info(f"[WORKER] Updated ticket {ticket_id} status to {next_status.value}")
             except SQLAlchemyError as db_error:
                 logger.error(f"[WORKER] Failed to update error status: {db_error}")
             
             # Re-raise for Huey retry logic
             raise
+
+
+@huey.periodic_task(crontab(minute='*'))
+def rescue_stuck_tickets():
+    """
+    Periodic task: requeue tickets left in PROCESSING by a crashed worker.
+    
+    Huey acknowledges a task when it is dequeued, so a worker killed
+    mid-triage leaves its ticket in PROCESSING with no redelivery. Tickets
+    not updated for STUCK_TICKET_TIMEOUT_SECONDS are reset to PENDING and
+    enqueued again. A late original run can still finish its Gemini call
+    (there is no enforced timeout), but its results are written only while
+    the ticket is PROCESSING, so it cannot overwrite a completed re-run or
+    an agent's resolve. The reset is published like any
+    other status change, which also drops the ticket's cached GET response.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(seconds=settings.STUCK_TICKET_TIMEOUT_SECONDS)
+    
+    with SessionLocal() as db, db.begin():
+        rescued = db.execute(
+            update(Ticket)
+            .where(Ticket.status == TicketStatus.PROCESSING, Ticket.updated_at < cutoff)
+            .values(status=TicketStatus.PENDING)
+            .returning(Ticket.id, Ticket.updated_at)
+        ).all()
+    
+    ticket_ids = [row.id for row in rescued]
+    for row in rescued:
+        # Pollers and WebSocket subscribers would otherwise keep seeing "processing"
+        publish_ticket_update(row.id, {
+            "id": row.id,
+            "status": TicketStatus.PENDING,
+            "updated_at": row.updated_at.isoformat()
+        })
+        process_ticket_triage(row.id)
+    
+    if ticket_ids:
+        logger.warning(f"[WORKER] Requeued {len(ticket_ids)} stuck ticket(s): {ticket_ids}")
@@ -17,14 +17,27 @@ def _mask_redis_url(url: str) -> str:
     return f"{parsed.scheme}://{parsed.hostname}:{parsed.port or 6379}{parsed.path}"
 
 
+# Consumer sizing is passed on the command line (see docker-compose):
+#   huey_consumer tasks.worker.huey -w $HUEY_WORKERS -k $HUEY_WORKER_TYPE
+# Each worker holds at most one DB connection per task, and the sync engine's
+# pool_size follows HUEY_WORKERS, so workers never wait on the pool. With
+# -k process every process gets its own pool of that size. Threads suit the
+# I/O-bound Gemini call; throughput is capped by the Gemini quota anyway.
+
 # Use MemoryHuey only for local process execution (non-Docker)
 # Use RedisHuey for development (Docker) and production
 if settings.ENVIRONMENT == "local":
     huey = MemoryHuey('triage-hub', immediate=False)
     logger.info("⚙️ Using MemoryHuey for local execution (no Redis required)")
 else:
+    # Blocking BRPOP dequeue (Huey's default, pinned here): workers wake as soon
+    # as a ticket is enqueued instead of polling with backoff sleeps
     huey = RedisHuey(
         'triage-hub',
-        url=settings.REDIS_URL
+        url=settings.REDIS_URL,
+        blocking=True,
+        read_timeout=1,
+    )
+    logger.info(
+        f"⚙️ Using RedisHuey (blocking dequeue) with Redis at {_mask_redis_url(settings.REDIS_URL)}"
     )
-    logger.info(f"⚙️ Using RedisHuey with Redis at {_mask_redis_url(settings.REDIS_URL)}")
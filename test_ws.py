@@ -11,6 +11,11 @@ except ImportError:
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger("ws_test")
 
+
+async def recv_messages(websocket):
+    """Receive one frame; every server frame is a JSON array of messages."""
+    return json.loads(await websocket.recv())
+
 async def test():
     uri = "ws://localhost:8000/ws/tickets"
     logger.info(f"Connecting to {uri}...")
@@ -24,18 +29,19 @@ async def test():
             await websocket.send(json.dumps(msg))
             logger.info(f"➡️ Sent: {msg}")
             
-            response = await websocket.recv()
-            logger.info(f"⬅️ Received: {response}")
+            for message in await recv_messages(websocket):
+                logger.info(f"⬅️ Received {message['type']}: {message}")
             
             # Ping
             await websocket.send(json.dumps({"action": "ping"}))
-            response = await websocket.recv()
-            logger.info(f"⬅️ Received(ping): {response}")
+            for message in await recv_messages(websocket):
+                logger.info(f"⬅️ Received(ping) {message['type']}: {message}")
 
             print("\nListening for 20 seconds. Please trigger an update using API within 20s...")
             try:
-                msg = await asyncio.wait_for(websocket.recv(), timeout=20)
-                logger.info(f"🔥 EVENT RECEIVED: {msg}")
+                messages = await asyncio.wait_for(recv_messages(websocket), timeout=20)
+                for message in messages:
+                    logger.info(f"🔥 EVENT RECEIVED {message['type']}: {message}")
             except asyncio.TimeoutError:
                 logger.warning("⏰ Timeout waiting for event")
                 
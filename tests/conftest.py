@@ -1,18 +1,25 @@
 """Pytest fixtures for testing."""
 
+import httpx
 import pytest
+import pytest_asyncio
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, insert
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 
 from app.main import app
 from app.database import Base, get_db
+from models.ticket import Ticket
 
 
 # Use in-memory SQLite for testing with StaticPool to share connection
 # StaticPool is required for in-memory SQLite to persist tables across connections
-SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///:memory:"
+# Named shared-cache DB so the sync fixture session and the async API session see the same data
+# In-memory DBs are private to a process, so pytest-xdist workers never share one
+SQLALCHEMY_TEST_DATABASE_URL = "sqlite:///file:triage_test?mode=memory&cache=shared&uri=true"
+SQLALCHEMY_TEST_ASYNC_DATABASE_URL = "sqlite+aiosqlite:///file:triage_test?mode=memory&cache=shared&uri=true"
 
 engine = create_engine(
     SQLALCHEMY_TEST_DATABASE_URL,
@@ -21,34 +28,84 @@ engine = create_engine(
 )
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# TestClient runs each request on its own event loop, so async connections are not pooled
+async_engine = create_async_engine(SQLALCHEMY_TEST_ASYNC_DATABASE_URL, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
 
-@pytest.fixture(scope="function")
-def db_session():
-    """Create a fresh database for each test."""
+
+@pytest.fixture(scope="session")
+def db_schema():
+    """Create the schema once per test session."""
     Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture(scope="function")
+def db_session(db_schema):
+    """
+    Database session with empty tables for each test.
+    
+    Rows are deleted after the test instead of re-running DDL. A rollback-only
+    outer transaction isn't possible: the API runs on its own async engine.
+    """
     db = TestingSessionLocal()
     try:
         yield db
     finally:
         db.close()
-        Base.metadata.drop_all(bind=engine)
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
 
 
-@pytest.fixture(scope="function")
-def client(db_session):
-    """Create a test client with test database."""
-    def override_get_db():
-        try:
-            yield db_session
-        finally:
-            pass
-    
+async def override_get_db():
+    """API database dependency bound to the test database."""
+    async with TestingAsyncSessionLocal() as db:
+        yield db
+
+
+@pytest.fixture(scope="session")
+def app_client():
+    """One TestClient for the whole session (the app is identical across tests)."""
     app.dependency_overrides[get_db] = override_get_db
     yield TestClient(app)
     app.dependency_overrides.clear()
 
 
-@pytest.fixture
+@pytest.fixture(scope="function")
+def client(db_session, app_client):
+    """Shared test client over a freshly emptied test database."""
+    return app_client
+
+
+@pytest_asyncio.fixture
+async def aclient(db_session, app_client):
+    """Async client on the test's event loop, so concurrent requests overlap."""
+    async with httpx.AsyncClient(app=app, base_url="http://test") as ac:
+        yield ac
+
+
+def make_tickets(session, specs):
+    """Insert tickets from column dicts in one executemany batch and commit."""
+    session.execute(insert(Ticket), specs)
+    session.commit()
+
+
+def persist_ticket(session, **columns) -> int:
+    """
+    Insert one ticket and return its id via INSERT ... RETURNING (no refresh SELECT).
+    
+    Commits, since the API reads through its own async connection.
+    """
+    ticket_id = session.scalar(insert(Ticket).returning(Ticket.id), [columns])
+    session.commit()
+    return ticket_id
+
+
+@pytest.fixture(scope="session")
 def sample_complaint():
     """Sample customer complaint for testing."""
     return "I was charged twice for order #12345. This is unacceptable!"
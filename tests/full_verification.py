@@ -46,10 +46,8 @@ def run_command(command, description):
 
 def wait_for_rate_limit_reset(seconds=65):
     print(f"\n{YELLOW}⏳ Waiting {seconds}s for Rate Limit cooldown...{RESET}")
-    for i in range(seconds, 0, -1):
-        print(f"\r   Time remaining: {i}s...", end="")
-        time.sleep(1)
-    print("\r   Reference reset complete.       \n")
+    time.sleep(seconds)  # One sleep instead of a per-second ticker
+    print("   Reference reset complete.\n")
 
 def main():
     print(f"{GREEN}🚀 STARTING FULL VERIFICATION SUITE{RESET}")
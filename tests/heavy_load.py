@@ -1,6 +1,6 @@
+import asyncio
 import time
 import httpx
-import concurrent.futures
 import random
 import sys
 from collections import Counter
@@ -25,12 +25,12 @@ COMPLAINTS = [
     "API documentation is unclear."
 ]
 
-def send_ticket(i):
-    """Send a single ticket creation request."""
+async def send_ticket(client, i):
+    """Send a single ticket creation request over the shared client."""
     complaint = random.choice(COMPLAINTS) + f" [LoadTest-{i}]"
     try:
         start = time.time()
-        resp = httpx.post(API_URL, json={"customer_complaint": complaint}, timeout=10.0)
+        resp = await client.post(API_URL, json={"customer_complaint": complaint})
         duration = time.time() - start
         return {
             "status_code": resp.status_code,
@@ -40,27 +40,45 @@ def send_ticket(i):
     except Exception as e:
         return {"status_code": "Error", "duration": 0, "error": str(e)}
 
+async def send_all():
+    """Send TOTAL_REQUESTS tickets, at most CONCURRENCY in flight, over kept-alive connections.
+    
+    Returns (status code counts, total request duration), tallied as results arrive.
+    """
+    limits = httpx.Limits(max_connections=CONCURRENCY, max_keepalive_connections=CONCURRENCY)
+    counts = Counter()
+    total_duration = 0.0
+    
+    async with httpx.AsyncClient(timeout=10.0, limits=limits) as client:
+        sem = asyncio.Semaphore(CONCURRENCY)
+        
+        async def one(i):
+            nonlocal total_duration
+            async with sem:
+                result = await send_ticket(client, i)
+            counts[result["status_code"]] += 1
+            total_duration += result["duration"]
+            sent = sum(counts.values())  # a handful of distinct status codes
+            if sent % 50 == 0:
+                print(f"   ...sent {sent}/{TOTAL_REQUESTS} requests")
+        
+        await asyncio.gather(*[one(i) for i in range(TOTAL_REQUESTS)])
+    return counts, total_duration
+
 def run_load_test():
-    print(f"🔥 STARTING HEAVY LOAD TEST: {TOTAL_REQUESTS} requests, {CONCURRENCY} threads")
+    print(f"🔥 STARTING HEAVY LOAD TEST: {TOTAL_REQUESTS} requests, {CONCURRENCY} concurrent")
     print(f"🎯 Target: API Throughput & Queue Resilience (Gemini Rate Limit: 60/min)")
     print("-" * 60)
 
     # 1. Blast API with requests
-    results = []
     start_time = time.time()
-    
-    with concurrent.futures.ThreadPoolExecutor(max_workers=CONCURRENCY) as executor:
-        futures = {executor.submit(send_ticket, i): i for i in range(TOTAL_REQUESTS)}
-        for future in concurrent.futures.as_completed(futures):
-            results.append(future.result())
-            if len(results) % 50 == 0:
-                print(f"   ...sent {len(results)}/{TOTAL_REQUESTS} requests")
+    counts, total_duration = asyncio.run(send_all())
 
     total_time = time.time() - start_time
-    success_count = sum(1 for r in results if r["status_code"] == 201)
-    blocked_count = sum(1 for r in results if r["status_code"] == 429)
-    error_count = len(results) - success_count - blocked_count
-    avg_duration = sum(r["duration"] for r in results) / len(results)
+    success_count = counts[201]
+    blocked_count = counts[429]
+    error_count = TOTAL_REQUESTS - success_count - blocked_count
+    avg_duration = total_duration / TOTAL_REQUESTS
 
     print("-" * 60)
     print(f"✅ Ingestion Complete in {total_time:.2f}s")
@@ -81,33 +99,22 @@ def run_load_test():
     
     # Poll count of statuses until all processed
     # We'll poll for 60 seconds max
-    for i in range(30):
-        try:
-            # Using list endpoint to get counts (not implemented ideally for stats, but works)
-            # Actually better to query DB directly or just check a sample. 
-            # Let's hit the list endpoint with limit=1 just to check stats if I implemented total count logic?
-            # List endpoint returns "total".
-            
-            resp_completed = httpx.get(f"{API_URL}?status=completed&limit=1")
-            resp_failed = httpx.get(f"{API_URL}?status=failed&limit=1")
-            resp_pending = httpx.get(f"{API_URL}?status=pending&limit=1")
-            resp_processing = httpx.get(f"{API_URL}?status=processing&limit=1")
-            
-            total_completed = resp_completed.json().get("total", 0)
-            total_failed = resp_failed.json().get("total", 0)
-            total_pending = resp_pending.json().get("total", 0)
-            total_processing = resp_processing.json().get("total", 0)
-            
-            print(f"   [{i*2}s] Pending: {total_pending} | Processing: {total_processing} | Completed: {total_completed} | Failed: {total_failed}")
-            
-            if total_pending == 0 and total_processing == 0:
-                print("\n✅ All tickets processed!")
-                break
+    with httpx.Client(timeout=5.0) as client:
+        for i in range(30):
+            try:
+                # One grouped COUNT per poll instead of four filtered list calls
+                stats = client.get(f"{API_URL}/stats").json()
+                
+                print(f"   [{i*2}s] Pending: {stats['pending']} | Processing: {stats['processing']} | Completed: {stats['completed']} | Failed: {stats['failed']}")
                 
-            time.sleep(2)
-        except Exception as e:
-            print(f"   Error polling status: {e}")
-            time.sleep(2)
+                if stats["pending"] == 0 and stats["processing"] == 0:
+                    print("\n✅ All tickets processed!")
+                    break
+                    
+                time.sleep(POLL_INTERVAL)
+            except Exception as e:
+                print(f"   Error polling status: {e}")
+                time.sleep(POLL_INTERVAL)
 
 if __name__ == "__main__":
     # Safety Check
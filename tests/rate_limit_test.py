@@ -1,11 +1,16 @@
 import time
 import httpx
+import orjson
 import sys
 
 API_URL = "http://localhost:8000/api/tickets"
 LIMIT = 30  # configured limit per minute
 TEST_COUNT = 35  # Should verify 30 success + 5 failures
 
+# One body for every request: the limiter only looks at the client IP
+BODY = orjson.dumps({"customer_complaint": "Rate limit test request"})
+JSON_HEADERS = {"content-type": "application/json"}
+
 def test_rate_limit():
     print(f"🛑 TESTING RATE LIMIT: Sending {TEST_COUNT} requests (Limit: {LIMIT}/min)...")
     
@@ -17,7 +22,7 @@ def test_rate_limit():
         for i in range(TEST_COUNT):
             try:
                 # Fast requests
-                resp = client.post(API_URL, json={"customer_complaint": f"Rate limit test {i}"})
+                resp = client.post(API_URL, content=BODY, headers=JSON_HEADERS)
                 
                 if resp.status_code == 201:
                     print(f"   req #{i+1}: 201 Created")
@@ -1,7 +1,10 @@
 """Tests for API endpoints."""
 
+import asyncio
 import pytest
+from datetime import datetime, timedelta, timezone
 from models.ticket import Ticket, TicketStatus
+from tests.conftest import make_tickets, persist_ticket
 
 
 class TestTicketAPI:
@@ -13,6 +16,57 @@ class TestTicketAPI:
         assert response.status_code == 200
         assert response.json() == {"status": "ok", "service": "triage-recovery-hub"}
     
+    def test_deep_health_check(self, client, monkeypatch):
+        """Test deep health pings DB and the shared Redis client."""
+        from redis.exceptions import ConnectionError as RedisConnectionError
+        from tests.conftest import TestingAsyncSessionLocal
+        
+        class DownRedis:
+            async def ping(self):
+                raise RedisConnectionError("connection refused")
+        
+        monkeypatch.setattr("app.database.AsyncSessionLocal", TestingAsyncSessionLocal)
+        monkeypatch.setattr("app.cache.get_async_client", lambda: DownRedis())
+        
+        response = client.get("/health/deep")
+        assert response.status_code == 503
+        assert response.json()["components"]["db"] == "ok"
+        assert response.json()["components"]["redis"].startswith("error")
+    
+    def test_deep_health_check_db_unreachable(self, client, monkeypatch):
+        """Test a refused DB connection reports 503, not an unhandled 500."""
+        
+        class UpRedis:
+            async def ping(self):
+                return True
+        
+        def refused_session():
+            raise OSError("Connect call failed ('127.0.0.1', 5432)")
+        
+        monkeypatch.setattr("app.database.AsyncSessionLocal", refused_session)
+        monkeypatch.setattr("app.cache.get_async_client", lambda: UpRedis())
+        
+        response = client.get("/health/deep")
+        assert response.status_code == 503
+        assert response.json()["status"] == "unhealthy"
+        assert response.json()["components"] == {
+            "db": "error: Connect call failed ('127.0.0.1', 5432)",
+            "redis": "ok",
+        }
+    
+    def test_routes_registered_once(self, client):
+        """Test no (method, path) pair is registered twice (single tickets router)."""
+        from collections import Counter
+        
+        routes = Counter(
+            (method, route.path)
+            for route in client.app.routes
+            for method in getattr(route, "methods", None) or ["WS"]
+        )
+        duplicates = [key for key, count in routes.items() if count > 1]
+        assert duplicates == []
+        assert routes[("GET", "/api/tickets")] == 1
+    
     def test_create_ticket(self, client, sample_complaint):
         """Test creating a new ticket."""
         response = client.post(
@@ -27,6 +81,18 @@ class TestTicketAPI:
         assert data["id"] is not None
         assert data["category"] is None  # AI hasn't processed yet
     
+    @pytest.mark.asyncio
+    async def test_concurrent_reads(self, aclient, db_session, sample_complaint):
+        """Test overlapping requests on the async API (reads: SQLite serializes writers)."""
+        make_tickets(db_session, [{"customer_complaint": f"{sample_complaint} #{i}"} for i in range(5)])
+        listing = await aclient.get("/api/tickets")
+        ids = [item["id"] for item in listing.json()["data"]]
+        
+        responses = await asyncio.gather(*[aclient.get(f"/api/tickets/{i}") for i in ids])
+        
+        assert [r.status_code for r in responses] == [200] * 5
+        assert [r.json()["id"] for r in responses] == ids
+    
     def test_create_ticket_validation_error(self, client):
         """Test creating ticket with invalid data."""
         # Too short
@@ -46,46 +112,138 @@ class TestTicketAPI:
     def test_list_tickets(self, client, db_session, sample_complaint):
         """Test listing tickets."""
         # Create test tickets
-        ticket1 = Ticket(customer_complaint=sample_complaint)
-        ticket2 = Ticket(customer_complaint="Another complaint")
-        db_session.add_all([ticket1, ticket2])
+        make_tickets(db_session, [
+            {"customer_complaint": sample_complaint},
+            {"customer_complaint": "Another complaint"},
+        ])
+        
+        response = client.get("/api/tickets?include_total=true")
+        assert response.status_code == 200
+        
+        data = response.json()
+        assert data["pagination"]["total"] == 2
+        assert len(data["data"]) == 2
+    
+    def test_list_tickets_total_is_opt_in(self, client, db_session, sample_complaint):
+        """Test COUNT is skipped unless include_total=true."""
+        db_session.add(Ticket(customer_complaint=sample_complaint))
         db_session.commit()
         
         response = client.get("/api/tickets")
         assert response.status_code == 200
         
-        data = response.json()
-        assert data["total"] == 2
-        assert len(data["items"]) == 2
+        pagination = response.json()["pagination"]
+        assert pagination["total"] is None
+        assert pagination["total_pages"] is None
+        assert pagination["has_more"] is False
+        assert pagination["next_cursor"] is None
+    
+    def test_list_tickets_keyset_pagination(self, client, db_session):
+        """Test walking pages with next_cursor returns every ticket once, newest first."""
+        base = datetime(2026, 1, 1, tzinfo=timezone.utc)
+        make_tickets(db_session, [
+            {"customer_complaint": f"Complaint {i}", "created_at": base + timedelta(minutes=i)}
+            for i in range(5)
+        ])
+        
+        seen = []
+        url = "/api/tickets?per_page=2"
+        while url:
+            response = client.get(url)
+            assert response.status_code == 200
+            data = response.json()
+            seen.extend(item["customer_complaint"] for item in data["data"])
+            cursor = data["pagination"]["next_cursor"]
+            url = f"/api/tickets?per_page=2&cursor={cursor}" if cursor else None
+        
+        assert seen == [f"Complaint {i}" for i in reversed(range(5))]
+    
+    def test_list_tickets_invalid_cursor(self, client):
+        """Test malformed cursor is rejected."""
+        response = client.get("/api/tickets?cursor=not-a-cursor")
+        assert response.status_code == 400
     
     def test_list_tickets_with_filters(self, client, db_session):
         """Test listing tickets with status filter."""
-        ticket1 = Ticket(customer_complaint="Test 1", status=TicketStatus.PENDING)
-        ticket2 = Ticket(customer_complaint="Test 2", status=TicketStatus.COMPLETED)
-        db_session.add_all([ticket1, ticket2])
-        db_session.commit()
+        make_tickets(db_session, [
+            {"customer_complaint": "Test 1", "status": TicketStatus.PENDING},
+            {"customer_complaint": "Test 2", "status": TicketStatus.COMPLETED},
+        ])
         
         # Filter by pending
-        response = client.get("/api/tickets?status=pending")
+        response = client.get("/api/tickets?status=pending&include_total=true")
         assert response.status_code == 200
         data = response.json()
-        assert data["total"] == 1
-        assert data["items"][0]["status"] == "pending"
+        assert data["pagination"]["total"] == 1
+        assert data["data"][0]["status"] == "pending"
+    
+    def test_list_tickets_invalid_filter(self, client):
+        """Test invalid enum filter values are rejected by validation."""
+        response = client.get("/api/tickets?status=bogus")
+        assert response.status_code == 422
+    
+    def test_ticket_stats(self, client, db_session, sample_complaint, monkeypatch):
+        """Test per-status counts come back from one endpoint."""
+        monkeypatch.setattr("api.tickets._stats_cache", None)
+        make_tickets(db_session, [
+            {"customer_complaint": sample_complaint, "status": status}
+            for status in (TicketStatus.PENDING, TicketStatus.COMPLETED, TicketStatus.COMPLETED)
+        ])
+        # A NULL status row is not counted (Core insert: the ORM would apply the default)
+        db_session.execute(Ticket.__table__.insert().values(customer_complaint=sample_complaint, status=None))
+        db_session.commit()
+        
+        response = client.get("/api/tickets/stats")
+        assert response.status_code == 200
+        assert response.json() == {"pending": 1, "processing": 0, "completed": 2, "failed": 0}
     
     def test_get_ticket(self, client, db_session, sample_complaint):
         """Test getting a single ticket."""
-        ticket = Ticket(customer_complaint=sample_complaint)
-        db_session.add(ticket)
-        db_session.commit()
-        db_session.refresh(ticket)
+        ticket_id = persist_ticket(db_session, customer_complaint=sample_complaint)
         
-        response = client.get(f"/api/tickets/{ticket.id}")
+        response = client.get(f"/api/tickets/{ticket_id}")
         assert response.status_code == 200
         
         data = response.json()
-        assert data["id"] == ticket.id
+        assert data["id"] == ticket_id
         assert data["customer_complaint"] == sample_complaint
     
+    def test_get_ticket_served_from_cache(self, client, monkeypatch):
+        """Test cached ticket JSON is returned without hitting the database."""
+        cached = '{"id": 42, "customer_complaint": "cached"}'
+        
+        async def fake_get_cached_ticket(ticket_id):
+            return cached if ticket_id == 42 else None
+        
+        monkeypatch.setattr("api.tickets.get_cached_ticket", fake_get_cached_ticket)
+        
+        response = client.get("/api/tickets/42")
+        assert response.status_code == 200
+        assert response.json() == {"id": 42, "customer_complaint": "cached"}
+    
+    @pytest.mark.parametrize("status,cached", [
+        (TicketStatus.PENDING, False),
+        (TicketStatus.PROCESSING, False),
+        (TicketStatus.COMPLETED, True),
+    ])
+    def test_get_ticket_caches_settled_tickets_only(self, client, db_session, sample_complaint, monkeypatch, status, cached):
+        """Test in-flight tickets are never cached (the worker may be committing)."""
+        writes = []
+        
+        async def no_cached_ticket(ticket_id):
+            return None
+        
+        async def record_cache_ticket(ticket_id, payload):
+            writes.append(ticket_id)
+        
+        monkeypatch.setattr("api.tickets.get_cached_ticket", no_cached_ticket)
+        monkeypatch.setattr("api.tickets.cache_ticket", record_cache_ticket)
+        ticket_id = persist_ticket(db_session, customer_complaint=sample_complaint, status=status)
+        
+        response = client.get(f"/api/tickets/{ticket_id}")
+        assert response.status_code == 200
+        assert writes == ([ticket_id] if cached else [])
+    
     def test_get_ticket_not_found(self, client):
         """Test getting non-existent ticket."""
         response = client.get("/api/tickets/999")
@@ -93,14 +251,11 @@ class TestTicketAPI:
     
     def test_update_ticket(self, client, db_session, sample_complaint):
         """Test updating ticket (agent edit)."""
-        ticket = Ticket(customer_complaint=sample_complaint)
-        db_session.add(ticket)
-        db_session.commit()
-        db_session.refresh(ticket)
+        ticket_id = persist_ticket(db_session, customer_complaint=sample_complaint)
         
         edited_response = "We've resolved this issue for you."
         response = client.patch(
-            f"/api/tickets/{ticket.id}",
+            f"/api/tickets/{ticket_id}",
             json={"agent_edited_response": edited_response}
         )
         
@@ -110,16 +265,23 @@ class TestTicketAPI:
     
     def test_resolve_ticket(self, client, db_session, sample_complaint):
         """Test resolving a ticket."""
-        ticket = Ticket(customer_complaint=sample_complaint)
-        db_session.add(ticket)
-        db_session.commit()
-        db_session.refresh(ticket)
+        ticket_id = persist_ticket(db_session, customer_complaint=sample_complaint)
         
         agent_id = "agent_001"
-        response = client.post(f"/api/tickets/{ticket.id}/resolve?agent_id={agent_id}")
+        response = client.post(f"/api/tickets/{ticket_id}/resolve?agent_id={agent_id}")
         
         assert response.status_code == 200
         data = response.json()
         assert data["status"] == "completed"
         assert data["agent_id"] == agent_id
         assert data["resolved_at"] is not None
+    
+    def test_update_ticket_not_found(self, client):
+        """Test updating non-existent ticket."""
+        response = client.patch("/api/tickets/999", json={"agent_edited_response": "Hello"})
+        assert response.status_code == 404
+    
+    def test_resolve_ticket_not_found(self, client):
+        """Test resolving non-existent ticket."""
+        response = client.post("/api/tickets/999/resolve?agent_id=agent_001")
+        assert response.status_code == 404
@@ -0,0 +1,164 @@
+"""Tests for background triage tasks."""
+
+import pytest
+from datetime import datetime, timedelta, timezone
+from unittest.mock import Mock, patch
+from sqlalchemy import update
+from models.ticket import Ticket, TicketStatus
+from tasks.triage import process_ticket_triage, rescue_stuck_tickets
+from tests.conftest import TestingSessionLocal
+
+
+class TestProcessTicketTriage:
+    """Test the Huey triage task against the test database."""
+    
+    def test_claims_and_completes_ticket(self, db_session, sample_complaint, mock_ai_response):
+        """Test a pending ticket is processed and both updates are published."""
+        ticket = Ticket(customer_complaint=sample_complaint)
+        db_session.add(ticket)
+        db_session.commit()
+        publish = Mock()
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update", publish), \
+                patch("tasks.triage.triage_service.triage_complaint", return_value=mock_ai_response) as triage:
+            process_ticket_triage.call_local(ticket.id)
+        
+        db_session.refresh(ticket)
+        assert ticket.status == TicketStatus.COMPLETED
+        assert ticket.category == mock_ai_response.category
+        assert triage.call_args.args[0] == sample_complaint
+        assert [c.args[1]["status"] for c in publish.call_args_list] == ["processing", "completed"]
+    
+    def test_skips_ticket_not_pending(self, db_session, sample_complaint):
+        """Test an already claimed ticket is left alone."""
+        ticket = Ticket(customer_complaint=sample_complaint, status=TicketStatus.PROCESSING)
+        db_session.add(ticket)
+        db_session.commit()
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update") as publish, \
+                patch("tasks.triage.triage_service.triage_complaint") as triage:
+            process_ticket_triage.call_local(ticket.id)
+        
+        triage.assert_not_called()
+        publish.assert_not_called()
+    
+    def test_late_result_does_not_overwrite_moved_ticket(self, db_session, sample_complaint, mock_ai_response):
+        """Test a run whose ticket left PROCESSING mid-call leaves the row untouched."""
+        ticket = Ticket(customer_complaint=sample_complaint)
+        db_session.add(ticket)
+        db_session.commit()
+        
+        def resolved_while_waiting(complaint, timeout):
+            # Rescued and re-run (or resolved by an agent) during a slow Gemini call
+            with TestingSessionLocal() as other, other.begin():
+                other.execute(
+                    update(Ticket)
+                    .where(Ticket.id == ticket.id)
+                    .values(status=TicketStatus.COMPLETED, agent_id="agent_001")
+                )
+            return mock_ai_response
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update") as publish, \
+                patch("tasks.triage.triage_service.triage_complaint", side_effect=resolved_while_waiting):
+            process_ticket_triage.call_local(ticket.id)
+        
+        db_session.refresh(ticket)
+        assert ticket.status == TicketStatus.COMPLETED
+        assert ticket.agent_id == "agent_001"
+        assert ticket.category is None
+        assert ticket.ai_draft_response is None
+        assert [c.args[1]["status"] for c in publish.call_args_list] == ["processing"]
+    
+    def test_marks_ticket_failed_on_error(self, db_session, sample_complaint):
+        """Test an AI error marks the ticket failed and re-raises for retry."""
+        ticket = Ticket(customer_complaint=sample_complaint)
+        db_session.add(ticket)
+        db_session.commit()
+        publish = Mock()
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update", publish), \
+                patch("tasks.triage.triage_service.triage_complaint", side_effect=RuntimeError("boom")):
+            with pytest.raises(RuntimeError):
+                process_ticket_triage.call_local(ticket.id)
+        
+        db_session.refresh(ticket)
+        assert ticket.status == TicketStatus.FAILED
+        assert ticket.error_message == "boom"
+        assert [c.args[1]["status"] for c in publish.call_args_list] == ["processing", "failed"]
+    
+    def test_failure_sets_jittered_retry_delay(self, db_session, sample_complaint, caplog):
+        """Test each retry gets a full-jitter delay bounded by the backoff window."""
+        ticket = Ticket(customer_complaint=sample_complaint)
+        db_session.add(ticket)
+        db_session.commit()
+        task = Mock(retries=2, retry_delay=5)
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update"), \
+                patch("tasks.triage.triage_service.triage_complaint", side_effect=RuntimeError("boom")), \
+                patch("tasks.triage.random.uniform", return_value=7.5) as uniform:
+            with pytest.raises(RuntimeError):
+                process_ticket_triage.call_local(ticket.id, task=task)
+        
+        # Second attempt (2 retries left of 3): window is 5 * 2**1 seconds
+        uniform.assert_called_once_with(0, 10)
+        assert task.retry_delay == 7.5
+        assert "retrying in 7.5s, 2 retries left" in caplog.text
+        db_session.refresh(ticket)
+        assert ticket.status == TicketStatus.PENDING  # The retry can claim it again
+    
+    def test_failed_attempt_is_retried_to_completion(self, db_session, sample_complaint, mock_ai_response):
+        """Test a failure with retries left re-queues the ticket and the retry completes it."""
+        ticket = Ticket(customer_complaint=sample_complaint)
+        db_session.add(ticket)
+        db_session.commit()
+        publish = Mock()
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update", publish), \
+                patch("tasks.triage.triage_service.triage_complaint",
+                      side_effect=[RuntimeError("boom"), mock_ai_response]) as triage:
+            with pytest.raises(RuntimeError):
+                process_ticket_triage.call_local(ticket.id, task=Mock(retries=3, retry_delay=5))
+            
+            db_session.refresh(ticket)
+            assert ticket.status == TicketStatus.PENDING
+            assert ticket.error_message == "boom"
+            
+            # Huey's retry runs the same task again (one retry used)
+            process_ticket_triage.call_local(ticket.id, task=Mock(retries=2, retry_delay=5))
+        
+        db_session.refresh(ticket)
+        assert ticket.status == TicketStatus.COMPLETED
+        assert ticket.error_message is None
+        assert triage.call_count == 2
+        assert [c.args[1]["status"] for c in publish.call_args_list] == [
+            "processing", "pending", "processing", "completed"
+        ]
+    
+    def test_rescue_requeues_stuck_tickets(self, db_session, sample_complaint):
+        """Test PROCESSING tickets past the timeout go back to PENDING and are requeued."""
+        stale = datetime.now(timezone.utc) - timedelta(hours=1)
+        stuck = Ticket(customer_complaint=sample_complaint, status=TicketStatus.PROCESSING, updated_at=stale)
+        active = Ticket(customer_complaint=sample_complaint, status=TicketStatus.PROCESSING)
+        db_session.add_all([stuck, active])
+        db_session.commit()
+        
+        with patch("tasks.triage.SessionLocal", TestingSessionLocal), \
+                patch("tasks.triage.publish_ticket_update") as publish, \
+                patch("tasks.triage.process_ticket_triage") as enqueue:
+            rescue_stuck_tickets.call_local()
+        
+        db_session.refresh(stuck)
+        db_session.refresh(active)
+        assert stuck.status == TicketStatus.PENDING
+        assert active.status == TicketStatus.PROCESSING
+        enqueue.assert_called_once_with(stuck.id)
+        # The reset is broadcast (and drops the cached GET response)
+        publish.assert_called_once()
+        assert publish.call_args.args[0] == stuck.id
+        assert publish.call_args.args[1]["status"] == TicketStatus.PENDING
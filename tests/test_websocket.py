@@ -0,0 +1,391 @@
+"""Tests for WebSocket connection management."""
+
+import orjson
+import pytest
+import asyncio
+from redis.exceptions import ConnectionError as RedisConnectionError
+from api.websocket import ConnectionManager, WebSocketOutbox
+from app.config import settings
+from models.ticket import Ticket
+from tests.conftest import TestingAsyncSessionLocal
+
+
+class FakeWebSocket:
+    """Minimal stand-in for starlette WebSocket (hashable, records sent frames)."""
+    
+    def __init__(self, fail: bool = False):
+        self.sent = []
+        self.fail = fail
+    
+    async def accept(self):
+        pass
+    
+    async def send_json(self, data):
+        if self.fail:
+            raise RuntimeError("socket closed")
+        self.sent.append(data)
+    
+    async def send_text(self, data):
+        await self.send_json(orjson.loads(data))
+
+
+class FakeSubscriber:
+    """Records Redis channel subscribe/unsubscribe calls."""
+    
+    def __init__(self, fail_subscribes: int = 0):
+        self.subscribed = []
+        self.unsubscribed = []
+        self.fail_subscribes = fail_subscribes
+    
+    async def subscribe(self, ticket_ids):
+        if self.fail_subscribes:
+            self.fail_subscribes -= 1
+            raise RedisConnectionError("connection reset")
+        self.subscribed.append(set(ticket_ids))
+    
+    async def unsubscribe(self, ticket_ids):
+        self.unsubscribed.append(set(ticket_ids))
+
+
+class StubSubscriber(FakeSubscriber):
+    """Subscriber whose listen loop just idles (no Redis)."""
+    
+    def __init__(self, callback=None):
+        super().__init__()
+    
+    async def run(self):
+        await asyncio.Event().wait()
+
+
+@pytest.fixture
+def stub_subscriber(monkeypatch):
+    monkeypatch.setattr("api.websocket.TicketUpdateSubscriber", StubSubscriber)
+
+
+async def drain_outboxes():
+    """Let per-socket outbox tasks write queued frames."""
+    await asyncio.sleep(0.01)
+
+
+class TestConnectionManager:
+    """Test subscription bookkeeping and broadcasts."""
+    
+    @pytest.mark.asyncio
+    async def test_subscribe_updates_reverse_index(self):
+        """Test subscribe tracks both ticket->sockets and socket->tickets."""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        
+        await manager.subscribe(ws, [1, 2])
+        
+        assert manager.active_connections[1] == {ws}
+        assert manager.active_connections[2] == {ws}
+        assert manager.ws_to_tickets[ws] == {1, 2}
+    
+    @pytest.mark.asyncio
+    async def test_unsubscribe_drops_empty_entries(self):
+        """Test unsubscribe removes empty buckets on both sides."""
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.subscribe(ws, [1, 2])
+        
+        await manager.unsubscribe(ws, [1, 2])
+        
+        assert 1 not in manager.active_connections
+        assert 2 not in manager.active_connections
+        assert ws not in manager.ws_to_tickets
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_only_touches_own_subscriptions(self):
+        """Test disconnect removes the socket and leaves other sockets subscribed."""
+        manager = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        manager.all_connections.update({ws_a, ws_b})
+        await manager.subscribe(ws_a, [1, 2])
+        await manager.subscribe(ws_b, [2, 3])
+        
+        await manager.disconnect(ws_a)
+        
+        assert 1 not in manager.active_connections
+        assert manager.active_connections[2] == {ws_b}
+        assert manager.active_connections[3] == {ws_b}
+        assert ws_a not in manager.ws_to_tickets
+    
+    @pytest.mark.asyncio
+    async def test_redis_channels_follow_first_and_last_watcher(self):
+        """Test ticket channels are subscribed once and released when unwatched."""
+        manager = ConnectionManager()
+        manager.subscriber = FakeSubscriber()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        manager.all_connections.update({ws_a, ws_b})
+        
+        await manager.subscribe(ws_a, [1, 2])
+        await manager.subscribe(ws_b, [2, 3])
+        await manager.disconnect(ws_a)
+        
+        assert manager.subscriber.subscribed == [{1, 2}, {3}]
+        assert manager.subscriber.unsubscribed == [{1}]
+    
+    @pytest.mark.asyncio
+    async def test_failed_channel_subscribe_records_nothing(self):
+        """Test a Redis subscribe failure leaves no channel-less entry, so a retry subscribes."""
+        manager = ConnectionManager()
+        manager.subscriber = FakeSubscriber(fail_subscribes=1)
+        ws = FakeWebSocket()
+        
+        with pytest.raises(RedisConnectionError):
+            await manager.subscribe(ws, [1])
+        assert 1 not in manager.active_connections
+        assert ws not in manager.ws_to_tickets
+        
+        assert await manager.subscribe(ws, [1]) is True
+        assert manager.subscriber.subscribed == [{1}]
+        assert manager.active_connections[1] == {ws}
+    
+    @pytest.mark.asyncio
+    async def test_failed_resubscribe_restarts_subscriber_on_next_connect(self, monkeypatch):
+        """Test a subscriber that could not restore channels is replaced on the next connect."""
+        started = []
+        
+        class FlakySubscriber(StubSubscriber):
+            def __init__(self, callback):
+                super().__init__()
+                self.fail_subscribes = 1 if not started else 0
+                started.append(self)
+        
+        monkeypatch.setattr("api.websocket.TicketUpdateSubscriber", FlakySubscriber)
+        manager = ConnectionManager()
+        watcher = FakeWebSocket()
+        manager.active_connections[1] = {watcher}  # Left over from a dead subscriber
+        
+        await manager.connect(FakeWebSocket())
+        await asyncio.sleep(0)
+        assert manager.redis_task.done()
+        
+        await manager.connect(FakeWebSocket())
+        assert len(started) == 2
+        assert started[1].subscribed == [{1}]
+        await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_concurrent_connects_start_one_subscriber_task(self, monkeypatch):
+        """Test racing connects share one Redis subscriber task."""
+        started = []
+        
+        class CountingSubscriber(StubSubscriber):
+            def __init__(self, callback):
+                super().__init__()
+                started.append(self)
+        
+        monkeypatch.setattr("api.websocket.TicketUpdateSubscriber", CountingSubscriber)
+        manager = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        
+        await asyncio.gather(manager.connect(ws_a), manager.connect(ws_b))
+        assert len(started) == 1
+        
+        await manager.disconnect(ws_a)
+        await manager.disconnect(ws_b)
+        assert manager.redis_task is None
+    
+    @pytest.mark.asyncio
+    async def test_subscribe_rejects_over_limit(self, monkeypatch):
+        """Test a socket cannot exceed the per-socket subscription cap."""
+        monkeypatch.setattr(settings, "WS_MAX_SUBSCRIPTIONS_PER_SOCKET", 3)
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        
+        assert await manager.subscribe(ws, [1, 2]) is True
+        assert await manager.subscribe(ws, [2, 3]) is True  # Re-subscribing 2 is free
+        assert await manager.subscribe(ws, [4]) is False
+        
+        assert manager.ws_to_tickets[ws] == {1, 2, 3}
+        assert 4 not in manager.active_connections
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_reaches_subscribers_only(self, stub_subscriber):
+        """Test broadcast is delivered to sockets subscribed to that ticket."""
+        manager = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws_a)
+        await manager.connect(ws_b)
+        await manager.subscribe(ws_a, [1])
+        await manager.subscribe(ws_b, [2])
+        
+        await manager.broadcast_ticket_update({"ticket_id": 1, "data": {"id": 1}})
+        await manager.flush_pending()
+        await drain_outboxes()
+        
+        assert ws_a.sent == [[{"type": "ticket_updated", "data": {"id": 1}}]]
+        assert ws_b.sent == []
+        await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_drops_failed_sockets(self, stub_subscriber):
+        """Test a failing socket does not block others and is unsubscribed."""
+        manager = ConnectionManager()
+        ws_ok, ws_dead = FakeWebSocket(), FakeWebSocket(fail=True)
+        await manager.connect(ws_ok)
+        await manager.connect(ws_dead)
+        await manager.subscribe(ws_ok, [1])
+        await manager.subscribe(ws_dead, [1])
+        
+        await manager.broadcast_ticket_update({"ticket_id": 1, "data": {"id": 1}})
+        await manager.flush_pending()
+        await drain_outboxes()
+        
+        assert len(ws_ok.sent) == 1
+        assert manager.active_connections[1] == {ws_ok}
+        assert ws_dead not in manager.ws_to_tickets
+        await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_slow_socket_drops_oldest_frames(self, stub_subscriber, monkeypatch):
+        """Test a full send queue keeps the newest frames instead of blocking."""
+        monkeypatch.setattr(settings, "WS_SEND_QUEUE_SIZE", 2)
+        manager = ConnectionManager()
+        ws = FakeWebSocket()
+        await manager.connect(ws)
+        await manager.subscribe(ws, [1])
+        
+        for version in range(3):
+            await manager.broadcast_ticket_update({"ticket_id": 1, "data": {"v": version}})
+            await manager.flush_pending()
+        await drain_outboxes()
+        
+        assert ws.sent == [[
+            {"type": "ticket_updated", "data": {"v": 1}},
+            {"type": "ticket_updated", "data": {"v": 2}},
+        ]]
+        await manager.shutdown()
+    
+    @pytest.mark.asyncio
+    async def test_broadcast_coalesces_burst(self, stub_subscriber, monkeypatch):
+        """Test updates within the window are merged, latest state per ticket."""
+        monkeypatch.setattr(settings, "WS_BROADCAST_WINDOW_MS", 1)
+        manager = ConnectionManager()
+        ws_a, ws_b = FakeWebSocket(), FakeWebSocket()
+        await manager.connect(ws_a)
+        await manager.connect(ws_b)
+        await manager.subscribe(ws_a, [1, 2])
+        await manager.subscribe(ws_b, [2])
+        
+        await manager.broadcast_ticket_update({"ticket_id": 1, "data": {"id": 1, "v": 1}})
+        await manager.broadcast_ticket_update({"ticket_id": 1, "data": {"id": 1, "v": 2}})
+        await manager.broadcast_ticket_update({"ticket_id": 2, "data": {"id": 2, "v": 1}})
+        await asyncio.sleep(0.05)
+        
+        assert ws_a.sent == [[{
+            "type": "ticket_batch",
+            "updates": [{"id": 1, "v": 2}, {"id": 2, "v": 1}],
+        }]]
+        assert ws_b.sent == [[{"type": "ticket_updated", "data": {"id": 2, "v": 1}}]]
+        await manager.shutdown()
+
+
+class TestWebSocketOutbox:
+    """Test per-connection frame batching."""
+    
+    @pytest.mark.asyncio
+    async def test_messages_queued_together_share_one_frame(self):
+        """Test a burst of replies shares one frame; every frame is an array."""
+        ws = FakeWebSocket()
+        outbox = WebSocketOutbox(ws)
+        outbox.start()
+        outbox.send({"type": "subscribed", "ticket_ids": [1, 2]})
+        outbox.send({"type": "ticket_updated", "data": {"id": 1}})
+        outbox.send({"type": "ticket_updated", "data": {"id": 2}})
+        await asyncio.sleep(0)
+        outbox.send({"type": "pong"})
+        await asyncio.sleep(0)
+        await outbox.close()
+        
+        assert ws.sent == [
+            [
+                {"type": "subscribed", "ticket_ids": [1, 2]},
+                {"type": "ticket_updated", "data": {"id": 1}},
+                {"type": "ticket_updated", "data": {"id": 2}},
+            ],
+            [{"type": "pong"}],
+        ]
+
+
+class TestWebSocketEndpoint:
+    """Test the /ws/tickets protocol."""
+    
+    def test_ping_pong(self, client):
+        """Test ping is answered with pong."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text('{"action": "ping"}')
+            assert ws.receive_json() == [{"type": "pong"}]
+    
+    def test_binary_frames_accepted(self, client):
+        """Test clients may send JSON as binary frames."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_bytes(b'{"action": "ping"}')
+            assert ws.receive_json() == [{"type": "pong"}]
+    
+    def test_subscribe_too_many_ids(self, client):
+        """Test oversized ticket_ids lists are rejected without subscribing."""
+        ids = list(range(settings.WS_MAX_TICKET_IDS_PER_MESSAGE + 1))
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text(orjson.dumps({"action": "subscribe", "ticket_ids": ids}).decode())
+            assert ws.receive_json()[0]["type"] == "error"
+    
+    def test_unknown_action(self, client):
+        """Test unknown actions are reported back to the client."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text('{"action": "dance"}')
+            assert ws.receive_json() == [{"type": "error", "message": "Unknown action: dance"}]
+    
+    def test_subscribe_non_integer_ids(self, client):
+        """Test ticket_ids that are not integers are rejected."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text('{"action": "subscribe", "ticket_ids": ["abc"]}')
+            assert ws.receive_json() == [{
+                "type": "error",
+                "message": "All ticket_ids must be valid integers",
+            }]
+    
+    def test_unsubscribe_non_integer_ids(self, client):
+        """Test unsubscribe rejects non-integer ids instead of dropping them."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text('{"action": "unsubscribe", "ticket_ids": [1, "abc"]}')
+            assert ws.receive_json() == [{
+                "type": "error",
+                "message": "All ticket_ids must be valid integers",
+            }]
+    
+    def test_subscribe_redis_failure_replies_error(self, client, monkeypatch):
+        """Test a failed channel subscribe is reported so the client can retry."""
+        
+        async def failing_subscribe(websocket, ticket_ids):
+            raise RedisConnectionError("connection reset")
+        
+        monkeypatch.setattr("api.websocket.manager.subscribe", failing_subscribe)
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text('{"action": "subscribe", "ticket_ids": [1]}')
+            assert ws.receive_json() == [{"type": "error", "message": "Subscription failed, please retry"}]
+    
+    def test_invalid_json(self, client):
+        """Test malformed frames get an error reply and keep the socket open."""
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text("{not json")
+            assert ws.receive_json() == [{"type": "error", "message": "Invalid JSON format"}]
+            ws.send_text('{"action": "ping"}')
+            assert ws.receive_json() == [{"type": "pong"}]
+    
+    def test_subscribe_sends_ack_and_snapshots_in_one_frame(self, client, db_session, monkeypatch, stub_subscriber):
+        """Test subscribe replies with the ack and a snapshot batch together."""
+        monkeypatch.setattr("api.websocket.AsyncSessionLocal", TestingAsyncSessionLocal)
+        ticket = Ticket(customer_complaint="Snapshot me please")
+        db_session.add(ticket)
+        db_session.commit()
+        
+        with client.websocket_connect("/ws/tickets") as ws:
+            ws.send_text(orjson.dumps({"action": "subscribe", "ticket_ids": [ticket.id]}).decode())
+            ack, snapshots = ws.receive_json()
+        
+        assert ack == {"type": "subscribed", "ticket_ids": [ticket.id]}
+        assert snapshots["type"] == "ticket_snapshot_batch"
+        assert [item["id"] for item in snapshots["data"]] == [ticket.id]